@@ -0,0 +1,6 @@
+"""
+Pacote de benchmarks do Diário de Bordo.
+
+Cada módulo pode ser executado a partir da raiz do projeto com
+``python -m benchmarks.<modulo>``.
+"""
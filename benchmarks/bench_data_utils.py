@@ -0,0 +1,65 @@
+"""
+Compara o parser de formato fixo de DataUtils com datetime.strptime, por
+chamada (com e sem repetição de datas) e em colunas inteiras.
+
+Uso: python -m benchmarks.bench_data_utils [valores]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+
+from utils import data_utils
+from utils.data_utils import DataUtils
+
+
+def _strptime(data: str, hora: str):
+    """Implementação anterior de validar_data_hora."""
+    try:
+        return True, datetime.strptime(f"{data} {hora}", DataUtils.FORMATO_DATA_HORA)
+    except ValueError:
+        return False, None
+
+
+def _cronometrar(funcao, repeticoes: int = 3) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        data_utils._ler_data.cache_clear()
+        data_utils._ler_hora.cache_clear()
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    inicio = datetime(2020, 1, 1, 6, 0)
+
+    # Histórico típico: várias viagens por dia, datas repetidas
+    instantes = [inicio + timedelta(minutes=137 * i) for i in range(total)]
+    datas = [instante.strftime('%d/%m/%Y') for instante in instantes]
+    horas = [instante.strftime('%H:%M') for instante in instantes]
+    # Datas todas distintas (pior caso para o cache)
+    datas_unicas = [(inicio + timedelta(days=i % 300000)).strftime('%d/%m/%Y') for i in range(total)]
+
+    for data, hora in zip(datas[:2000] + ['31/02/2024', '1/2/2024', 'xx/yy/zzzz'],
+                          horas[:2000] + ['08:00', '8:05', '24:00']):
+        assert DataUtils.validar_data_hora(data, hora) == _strptime(data, hora), (data, hora)
+
+    casos = [
+        ('strptime', lambda: [_strptime(d, h) for d, h in zip(datas, horas)]),
+        ('validar_data_hora', lambda: [DataUtils.validar_data_hora(d, h) for d, h in zip(datas, horas)]),
+        ('converter_datas_horas', lambda: DataUtils.converter_datas_horas(datas, horas)),
+        ('strptime (datas únicas)', lambda: [_strptime(d, '08:00') for d in datas_unicas]),
+        ('validar_data_hora (únicas)', lambda: [DataUtils.validar_data_hora(d, '08:00') for d in datas_unicas]),
+    ]
+
+    print(f"{total} valores")
+    for nome, funcao in casos:
+        duracao = _cronometrar(funcao)
+        print(f"  {nome:<28} {duracao * 1000:8.1f} ms  ({duracao * 1e9 / total:6.0f} ns/valor)")
+
+
+if __name__ == '__main__':
+    main()
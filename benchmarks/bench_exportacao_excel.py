@@ -0,0 +1,61 @@
+"""
+Compara pico de memória (RSS) e tempo da exportação para Excel via
+``pandas.DataFrame.to_excel`` com o ExportadorExcel em modo write_only.
+
+Cada medição roda em um processo novo para que o pico de RSS seja só dela.
+
+Uso: python -m benchmarks.bench_exportacao_excel [linhas ...]   (padrão: 100000 1000000)
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+MEDIR = '''
+import resource, sys, time
+from database.database import DatabaseManager
+db = DatabaseManager(sys.argv[1])
+destino = sys.argv[2]
+inicio = time.perf_counter()
+if sys.argv[3] == 'pandas':
+    import pandas as pd
+    pd.DataFrame(db.obter_viagens()).to_excel(destino, index=False, engine='openpyxl')
+else:
+    from utils.exportacao_excel import ExportadorExcel
+    ExportadorExcel.exportar(db.iter_viagens(), destino)
+duracao = time.perf_counter() - inicio
+print(duracao, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+
+def _popular(caminho: str, linhas: int):
+    """Cria um banco com ``linhas`` viagens finalizadas."""
+    from database.database import DatabaseManager
+
+    with DatabaseManager(caminho, perfil='fast') as db:
+        db.inserir_viagens_em_lote(
+            {'data': f"{i % 28 + 1:02d}/{i % 12 + 1:02d}/{2015 + i % 10}", 'hora_saida': '08:00',
+             'km_inicial': i, 'destino': f'Destino {i % 50}', 'hora_chegada': '09:30', 'km_final': i + 42}
+            for i in range(linhas)
+        )
+
+
+def executar(tamanhos=(100000, 1000000)):
+    """Executa o benchmark para cada tamanho de histórico."""
+    with tempfile.TemporaryDirectory() as pasta:
+        for linhas in tamanhos:
+            banco = os.path.join(pasta, f'{linhas}.db')
+            _popular(banco, linhas)
+            print(f"{linhas} viagens")
+            for modo in ('pandas', 'write_only'):
+                saida = subprocess.run(
+                    [sys.executable, '-c', MEDIR, banco, os.path.join(pasta, f'{modo}.xlsx'), modo],
+                    capture_output=True, text=True, check=True
+                )
+                segundos, rss_kb = saida.stdout.split()
+                print(f"  {modo:10s} tempo={float(segundos):7.1f}s  pico RSS={int(rss_kb) / 1024:7.0f} MB")
+
+
+if __name__ == '__main__':
+    executar([int(arg) for arg in sys.argv[1:]] or (100000, 1000000))
@@ -0,0 +1,85 @@
+"""
+Compara o banco único com o armazenamento fragmentado por ano: consultas do
+dia a dia (viagem ativa, primeira página, nova viagem) e manutenção do
+período atual (VACUUM e backup) com vários anos de histórico.
+
+Uso: python -m benchmarks.bench_fragmentos [viagens_por_ano] [anos]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from database.database import VEICULO_PADRAO, DatabaseManager
+from database.fragmentos import DatabaseManagerFragmentado
+
+
+def _popular(db: DatabaseManager, viagens_por_ano: int, anos: int) -> int:
+    """Insere o histórico ano a ano; a última viagem do ano mais recente fica em aberto."""
+    ultimo_ano = 2000 + anos - 1
+    for ano in range(2000, ultimo_ano + 1):
+        linhas = []
+        for i in range(viagens_por_ano):
+            dia = f"{1 + i % 28:02d}/{1 + (i // 28) % 12:02d}/{ano}"
+            aberta = ano == ultimo_ano and i == viagens_por_ano - 1
+            linhas.append((dia, DatabaseManager._data_iso(dia), f"{6 + i % 12:02d}:00", i * 10, 'Destino',
+                           None if aberta else '23:00', None if aberta else i * 10 + 10))
+        db.inserir_linhas_validadas(linhas)
+    return ultimo_ano
+
+
+def _cronometrar(funcao, repeticoes: int = 200) -> float:
+    """Tempo médio por chamada, em milissegundos."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) * 1e3 / repeticoes
+
+
+def main():
+    viagens_por_ano = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    anos = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    print(f"{anos} anos x {viagens_por_ano} viagens; tempos em ms")
+    for nome in ('único', 'fragmentado'):
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = os.path.join(diretorio, 'diario.db')
+            if nome == 'único':
+                db = DatabaseManager(caminho)
+            else:
+                db = DatabaseManagerFragmentado(caminho, granularidade='ano')
+            ano = _popular(db, viagens_por_ano, anos)
+            assert db.obter_viagem_ativa(VEICULO_PADRAO) is not None
+
+            ativa = _cronometrar(lambda: db.obter_viagem_ativa(VEICULO_PADRAO))
+            pagina = _cronometrar(lambda: db.obter_viagens_pagina(limit=50, veiculo_id=VEICULO_PADRAO))
+            nova = _cronometrar(lambda: db.iniciar_viagem(f"28/12/{ano}", '23:59', 0, 'Novo'), 50)
+
+            inicio = time.perf_counter()
+            if nome == 'único':
+                with db._get_connection() as conn:
+                    conn.execute('VACUUM')
+            else:
+                db.vacuum_fragmento(ano)
+            vacuum = (time.perf_counter() - inicio) * 1e3
+
+            inicio = time.perf_counter()
+            destino = os.path.join(diretorio, 'copia.db')
+            if nome == 'único':
+                with db._get_connection() as conn:
+                    copia = sqlite3.connect(destino)
+                    conn.backup(copia)
+                    copia.close()
+            else:
+                db.backup_fragmento(ano, destino)
+            backup = (time.perf_counter() - inicio) * 1e3
+            db.close()
+
+        print(f"  {nome:12s} ativa {ativa:6.2f}  página {pagina:6.2f}  nova viagem {nova:6.2f}  "
+              f"vacuum do ano {vacuum:8.1f}  backup do ano {backup:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
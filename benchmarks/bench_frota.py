@@ -0,0 +1,64 @@
+"""
+Mede as consultas de um veículo (viagem ativa, primeira página do histórico,
+último KM) conforme a frota cresce, com o mesmo número de viagens por veículo.
+
+Uso: python -m benchmarks.bench_frota [viagens_por_veiculo] [veiculos ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from database.database import DatabaseManager
+
+
+def _popular(db: DatabaseManager, veiculos: int, viagens_por_veiculo: int) -> int:
+    """Cadastra a frota e insere o histórico de cada veículo (a última viagem fica em aberto)."""
+    veiculo_id = None
+    for numero in range(veiculos):
+        veiculo_id = db.cadastrar_veiculo(f"FRT{numero:04d}")
+        linhas = []
+        for i in range(viagens_por_veiculo):
+            dia = f"{1 + i % 28:02d}/{1 + (i // 28) % 12:02d}/{2015 + i // 336}"
+            aberta = i == viagens_por_veiculo - 1
+            linhas.append((dia, DatabaseManager._data_iso(dia), '08:00', i * 10, 'Destino',
+                           None if aberta else '09:00', None if aberta else i * 10 + 10))
+        db.inserir_linhas_validadas(linhas, veiculo_id)
+    return veiculo_id
+
+
+def _cronometrar(funcao, repeticoes: int = 200) -> float:
+    """Tempo médio por chamada, em microssegundos."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) * 1e6 / repeticoes
+
+
+def main():
+    viagens_por_veiculo = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    frotas = [int(n) for n in sys.argv[2:]] or [1, 50, 200]
+
+    print(f"{viagens_por_veiculo} viagens por veículo; tempos por chamada para um veículo")
+    for veiculos in frotas:
+        with tempfile.TemporaryDirectory() as diretorio:
+            db = DatabaseManager(os.path.join(diretorio, 'frota.db'))
+            veiculo_id = _popular(db, veiculos, viagens_por_veiculo)
+            assert db.obter_viagem_ativa(veiculo_id) is not None
+
+            ativa = _cronometrar(lambda: db.obter_viagem_ativa(veiculo_id))
+            pagina = _cronometrar(lambda: db.obter_viagens_pagina(limit=50, veiculo_id=veiculo_id))
+
+            def ultimo_km():
+                with db._get_connection() as conn:
+                    db._consultar_ultimo_km(conn, veiculo_id)
+            km = _cronometrar(ultimo_km)
+            db.close()
+
+        print(f"  {veiculos:4d} veículos ({veiculos * viagens_por_veiculo:7d} viagens): "
+              f"ativa {ativa:7.1f} us  página {pagina:7.1f} us  último km {km:7.1f} us")
+
+
+if __name__ == '__main__':
+    main()
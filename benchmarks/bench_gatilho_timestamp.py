@@ -0,0 +1,70 @@
+"""
+Compara a amplificação de escrita do gatilho atualiza_timestamp com a
+gravação de atualizado_em no próprio UPDATE.
+
+Uso: python -m benchmarks.bench_gatilho_timestamp [linhas]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from database.database import DatabaseManager
+
+GATILHO_ANTIGO = '''
+    CREATE TRIGGER atualiza_timestamp
+    AFTER UPDATE ON viagens
+    FOR EACH ROW
+    BEGIN
+        UPDATE viagens SET atualizado_em = CURRENT_TIMESTAMP WHERE id = OLD.id;
+    END;
+'''
+
+
+def _medir(db: DatabaseManager, linhas: int) -> dict:
+    """Insere ``linhas`` viagens e finaliza cada uma em sua própria transação."""
+    ids = [db.iniciar_viagem('01/01/2024', '08:00', i, 'Destino') for i in range(linhas)]
+
+    with db._get_connection() as conn:
+        # Sem checkpoint automático o WAL acumula todas as páginas gravadas
+        conn.execute('PRAGMA wal_autocheckpoint = 0')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        mudancas_antes = conn.total_changes
+
+    inicio = time.perf_counter()
+    for viagem_id in ids:
+        db.finalizar_viagem(viagem_id, '09:00', 100)
+    duracao = time.perf_counter() - inicio
+
+    with db._get_connection() as conn:
+        # Com um único escritor no pool, total_changes inclui as linhas alteradas pelo gatilho
+        mudancas = conn.total_changes - mudancas_antes
+        _, quadros_wal, _ = conn.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchone()
+
+    return {
+        'linhas_alteradas': mudancas,
+        'paginas_wal': quadros_wal,
+        'segundos': duracao,
+    }
+
+
+def executar(linhas: int = 2000):
+    """Executa o benchmark e imprime o resultado das duas variantes."""
+    with tempfile.TemporaryDirectory() as pasta:
+        resultados = {}
+        for nome, com_gatilho in (('com gatilho', True), ('sem gatilho', False)):
+            with DatabaseManager(os.path.join(pasta, f'{nome}.db'), pool_size=1) as db:
+                if com_gatilho:
+                    with db._get_connection() as conn:
+                        conn.executescript(GATILHO_ANTIGO)
+                resultados[nome] = _medir(db, linhas)
+
+    print(f"finalizar_viagem x {linhas}")
+    for nome, r in resultados.items():
+        print(f"  {nome:12s} linhas alteradas={r['linhas_alteradas']:6d}  "
+              f"páginas WAL={r['paginas_wal']:6d}  tempo={r['segundos']:.3f}s")
+
+
+if __name__ == '__main__':
+    executar(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,47 @@
+"""
+Mede o tempo de partida a frio do pacote database em processos novos.
+
+Uso: python -m benchmarks.bench_inicializacao [repeticoes]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CENARIOS = {
+    'import database': 'import database',
+    'import + primeira consulta': 'import database; database.obter_db_manager().obter_viagem_ativa()',
+}
+
+MEDIR = '''
+import time
+inicio = time.perf_counter()
+{codigo}
+print((time.perf_counter() - inicio) * 1000)
+'''
+
+
+def _medir(codigo: str, ambiente: dict, repeticoes: int) -> float:
+    """Executa ``codigo`` em processos novos e retorna a mediana em ms."""
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, '-c', MEDIR.format(codigo=codigo)],
+            capture_output=True, text=True, check=True, env=ambiente
+        )
+        tempos.append(float(saida.stdout.strip()))
+    return statistics.median(tempos)
+
+
+def executar(repeticoes: int = 10):
+    """Executa o benchmark e imprime a mediana de cada cenário."""
+    with tempfile.TemporaryDirectory() as pasta:
+        ambiente = dict(os.environ, DIARIO_BORDO_DB=os.path.join(pasta, 'diario_bordo.db'))
+        for nome, codigo in CENARIOS.items():
+            print(f"  {nome:28s} {_medir(codigo, ambiente, repeticoes):7.1f} ms")
+
+
+if __name__ == '__main__':
+    executar(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
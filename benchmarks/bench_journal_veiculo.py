@@ -0,0 +1,53 @@
+"""
+Compara o custo por viagem do Veiculo nos modos snapshot e journal, com um
+histórico já existente, e o tempo de carga (reaplicação do journal).
+
+Uso: python -m benchmarks.bench_journal_veiculo [viagens_existentes] [novas]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from models.veiculo import Veiculo
+
+
+def _medir(modo: str, existentes: int, novas: int) -> dict:
+    """Registra ``novas`` viagens sobre um histórico de ``existentes``."""
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = os.path.join(diretorio, 'historico_viagens.json')
+        veiculo = Veiculo(arquivo, modo='journal', limite_compactacao=existentes * 2 + 1)
+        for i in range(existentes):
+            veiculo.iniciar_viagem('01/01/2024', '08:00', i, 'Destino')
+            veiculo.finalizar_viagem('01/01/2024', '09:00', i + 10)
+        veiculo.compactar()
+
+        veiculo = Veiculo(arquivo, modo=modo, limite_compactacao=novas * 2 + 1)
+        inicio = time.perf_counter()
+        for i in range(novas):
+            veiculo.iniciar_viagem('02/01/2024', '08:00', existentes + i, 'Destino')
+            veiculo.finalizar_viagem('02/01/2024', '09:00', existentes + i + 10)
+        escrita = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        carregado = Veiculo(arquivo, modo='journal', limite_compactacao=novas * 2 + 1)
+        carga = time.perf_counter() - inicio
+        assert len(carregado.viagens) == existentes + novas
+
+        return {'escrita': escrita, 'carga': carga}
+
+
+def main():
+    existentes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    novas = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    print(f"{existentes} viagens existentes, {novas} novas (2 gravações cada)")
+    for modo in Veiculo.MODOS:
+        resultado = _medir(modo, existentes, novas)
+        print(f"{modo:>9}: {resultado['escrita'] * 1000 / (novas * 2):8.2f} ms/gravação, "
+              f"carga {resultado['carga'] * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
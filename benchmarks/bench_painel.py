@@ -0,0 +1,73 @@
+"""
+Mede o tempo para obter os indicadores do Painel: GROUP BY direto na
+tabela viagens, GROUP BY nas tabelas de resumo (cache vazio) e leitura do
+cache do controller chaveado pelo contador de alterações do banco.
+
+Uso: python -m benchmarks.bench_painel [viagens]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from controllers.viagem_controller import ViagemController
+from database.database import VEICULO_PADRAO, DatabaseManager
+
+# Mesmos indicadores do Painel, calculados sobre todas as viagens
+CONSULTAS_VIAGENS = [
+    'SELECT COUNT(*), COUNT(hora_chegada), SUM(km_percorrido), SUM(duracao_min) FROM viagens WHERE veiculo_id = ?',
+    '''SELECT substr(data_iso, 1, 7), SUM(km_percorrido) FROM viagens WHERE veiculo_id = ?
+       GROUP BY 1 ORDER BY 1''',
+    '''SELECT destino, COUNT(*), SUM(km_percorrido), SUM(duracao_min) FROM viagens WHERE veiculo_id = ?
+       GROUP BY destino ORDER BY 3 DESC LIMIT 10''',
+    '''SELECT strftime('%w', data_iso), COUNT(*), SUM(km_percorrido), SUM(duracao_min) FROM viagens
+       WHERE veiculo_id = ? GROUP BY 1''',
+]
+
+
+def _popular(db: DatabaseManager, total: int):
+    """Insere ``total`` viagens finalizadas em lotes (10 anos, 50 destinos)."""
+    for inicio in range(0, total, 100000):
+        linhas = []
+        for i in range(inicio, min(inicio + 100000, total)):
+            dia = f"{1 + i % 28:02d}/{1 + (i // 28) % 12:02d}/{2015 + (i // 336) % 10}"
+            linhas.append((dia, DatabaseManager._data_iso(dia), f"{6 + i % 12:02d}:00", i,
+                           f"Destino {i % 50}", f"{7 + i % 12:02d}:30", i + 40))
+        db.inserir_linhas_validadas(linhas)
+
+
+def _cronometrar(funcao, repeticoes: int) -> float:
+    """Tempo médio por chamada, em milissegundos."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) * 1e3 / repeticoes
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        db = DatabaseManager(os.path.join(diretorio, 'painel.db'))
+        _popular(db, total)
+        controller = ViagemController(db)
+
+        def direto():
+            with db._get_connection() as conn:
+                for consulta in CONSULTAS_VIAGENS:
+                    conn.execute(consulta, (VEICULO_PADRAO,)).fetchall()
+
+        def sem_cache():
+            controller.invalidar_cache()
+            controller.obter_painel()
+
+        print(f"{total} viagens; tempo para obter os indicadores do Painel")
+        print(f"  GROUP BY em viagens        {_cronometrar(direto, 3):9.1f} ms")
+        print(f"  GROUP BY nos resumos       {_cronometrar(sem_cache, 20):9.2f} ms")
+        print(f"  cache do controller        {_cronometrar(controller.obter_painel, 1000):9.3f} ms")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Compara um relatório de km e horas por mês e destino calculado com pandas
+sobre o histórico inteiro (obter_viagens) com a leitura das tabelas de
+resumo, e mede o custo que a manutenção dos resumos acrescenta às escritas.
+
+Uso: python -m benchmarks.bench_resumos [viagens]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from database import resumos
+from database.database import VEICULO_PADRAO, DatabaseManager
+
+
+def _popular(db: DatabaseManager, total: int):
+    """Insere ``total`` viagens finalizadas espalhadas por 10 anos e 20 destinos."""
+    linhas = []
+    for i in range(total):
+        dia = f"{1 + i % 28:02d}/{1 + (i // 28) % 12:02d}/{2015 + (i // 336) % 10}"
+        linhas.append((dia, DatabaseManager._data_iso(dia), '08:00', i, f"Destino {i % 20}",
+                       '09:30', i + 25))
+    db.inserir_linhas_validadas(linhas)
+
+
+def _relatorio_pandas(db: DatabaseManager) -> pd.DataFrame:
+    """Relatório como era feito antes: histórico inteiro em um DataFrame."""
+    df = pd.DataFrame(db.obter_viagens(VEICULO_PADRAO))
+    df['mes'] = df['data_iso'].str[:7]
+    return df.groupby(['mes', 'destino']).agg(
+        viagens=('id', 'size'), km=('km_percorrido', 'sum'), minutos=('duracao_min', 'sum'))
+
+
+def _cronometrar(funcao, repeticoes: int) -> float:
+    """Tempo médio por chamada, em milissegundos."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) * 1e3 / repeticoes
+
+
+def _sem_resumos(funcao):
+    """Executa ``funcao`` com a manutenção dos resumos desligada (linha de base)."""
+    original = resumos.somar
+    resumos.somar = lambda *args, **kwargs: None
+    try:
+        return funcao()
+    finally:
+        resumos.somar = original
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        db = DatabaseManager(os.path.join(diretorio, 'resumos.db'))
+        _popular(db, total)
+
+        linhas = len(db.obter_resumo('mes', ('periodo', 'destino'), VEICULO_PADRAO))
+        pandas_ms = _cronometrar(lambda: _relatorio_pandas(db), 3)
+        resumo_ms = _cronometrar(lambda: db.obter_resumo('mes', ('periodo', 'destino'), VEICULO_PADRAO), 50)
+        print(f"{total} viagens; relatório mês x destino ({linhas} linhas)")
+        print(f"  pandas sobre obter_viagens {pandas_ms:9.1f} ms")
+        print(f"  tabelas de resumo          {resumo_ms:9.2f} ms")
+
+        def escrever():
+            viagem_id = db.iniciar_viagem('15/06/2024', '08:00', 0, 'Destino 1')
+            db.finalizar_viagem(viagem_id, '09:00', 10)
+            db.atualizar_viagem(viagem_id, destino='Destino 2')
+
+        base = _sem_resumos(lambda: _cronometrar(escrever, 300))
+        com_resumos = _cronometrar(escrever, 300)
+        print(f"  iniciar + finalizar + atualizar: {base:.2f} ms sem resumos, "
+              f"{com_resumos:.2f} ms com resumos")
+
+        inicio = time.perf_counter()
+        db.reconstruir_resumos()
+        print(f"  reconstruir_resumos: {(time.perf_counter() - inicio) * 1e3:.0f} ms")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Compara memória, tempo de agregação e de serialização de uma lista de
+Viagem com a TabelaViagens colunar.
+
+Uso: python -m benchmarks.bench_tabela_viagens [viagens]
+"""
+
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from models.tabela_viagens import TabelaViagens
+from models.viagem import Viagem
+
+DESTINOS = [f"Destino {i}" for i in range(40)]
+
+
+def _gerar(total: int):
+    """Gera viagens finalizadas com datas, horários e destinos variados."""
+    inicio = datetime(2020, 1, 1, 6, 0)
+    for i in range(total):
+        saida = inicio + timedelta(hours=7 * i)
+        # Strings novas por viagem, como na carga do JSON
+        viagem = Viagem(saida.strftime('%d/%m/%Y'), saida, i * 50, ''.join(DESTINOS[i % 40]))
+        viagem.finalizar_viagem(saida + timedelta(minutes=30 + i % 200), i * 50 + 10 + i % 90)
+        yield viagem
+
+
+def _memoria(construir) -> tuple:
+    """Memória alocada (bytes) pela estrutura construída e a estrutura."""
+    tracemalloc.start()
+    estrutura = construir()
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return atual, estrutura
+
+
+def _tabela_serializada(total: int) -> TabelaViagens:
+    """Tabela que já passou por um para_dicts, cujo resultado é descartado."""
+    tabela = TabelaViagens(_gerar(total))
+    tabela.para_dicts()
+    return tabela
+
+
+def _agregar_lista(viagens):
+    """Agregados iterando objeto por objeto, como antes."""
+    total_km = 0
+    duracao = 0
+    por_destino = defaultdict(int)
+    for viagem in viagens:
+        km = viagem.calcular_km_percorrido()
+        total_km += km
+        por_destino[viagem.destino] += km
+        if viagem.horario_chegada:
+            duracao += (viagem.horario_chegada - viagem.horario_saida).seconds // 60
+    return total_km, duracao, dict(por_destino)
+
+
+def _agregar_tabela(tabela):
+    return tabela.total_km(), tabela.duracao_total_min(), tabela.km_por_destino()
+
+
+def _cronometrar(funcao, *args, repeticoes: int = 5) -> tuple:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    memoria_lista, lista = _memoria(lambda: list(_gerar(total)))
+    memoria_tabela, tabela = _memoria(lambda: TabelaViagens(_gerar(total)))
+    memoria_serializada, _ = _memoria(lambda: _tabela_serializada(total))
+
+    tempo_lista, agregados_lista = _cronometrar(_agregar_lista, lista)
+    tempo_tabela, agregados_tabela = _cronometrar(_agregar_tabela, tabela)
+    assert agregados_lista == agregados_tabela
+
+    tempo_dicts_lista, dicts_lista = _cronometrar(
+        lambda: [viagem.to_dict(i + 1) for i, viagem in enumerate(lista)], repeticoes=1)
+    tempo_dicts_tabela, dicts_tabela = _cronometrar(tabela.para_dicts)
+    assert dicts_lista == dicts_tabela
+
+    print(f"{total} viagens")
+    print(f"  memória     lista {memoria_lista / 2**20:7.1f} MiB   tabela {memoria_tabela / 2**20:7.1f} MiB"
+          f"   (após para_dicts {memoria_serializada / 2**20:.1f} MiB)")
+    print(f"  agregados   lista {tempo_lista * 1000:7.1f} ms    tabela {tempo_tabela * 1000:7.1f} ms")
+    print(f"  para dicts  lista {tempo_dicts_lista * 1000:7.1f} ms    tabela {tempo_dicts_tabela * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,58 @@
-import pandas as pd
+import codecs
+import csv
+import io
 import json
 import os
+import sqlite3
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional
-from database.database import DatabaseManager
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from database import DatabaseManager, VEICULO_PADRAO, obter_db_manager
+from utils.exportacao_excel import ExportadorExcel
 
 
 class ViagemController:
-    """Controlador para gerenciar operações relacionadas a viagens."""
+    """Controlador para gerenciar operações relacionadas às viagens de um veículo."""
 
-    def __init__(self):
-        self.db = DatabaseManager()
+    # Número máximo de consultas distintas (ex.: páginas) mantidas em cache
+    MAX_ITENS_CACHE = 64
+
+    def __init__(self, db: Optional[DatabaseManager] = None, veiculo_id: int = VEICULO_PADRAO):
+        self.db = db or obter_db_manager()
+        # Todas as leituras e escritas ficam restritas a este veículo
+        self.veiculo_id = veiculo_id
         self.FORMATO_DATA = '%d/%m/%Y'
         self.FORMATO_HORA = '%H:%M'
+        # Cache de leituras; invalidado pelos métodos de escrita deste controller
+        self.versao_dados = 0
+        self._cache: OrderedDict = OrderedDict()
+        self._lock_cache = threading.Lock()
+
+    def _em_cache(self, chave: tuple, carregar: Callable[[], Any]) -> Any:
+        """Retorna o valor em cache para ``chave`` ou o carrega do banco."""
+        with self._lock_cache:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                return self._cache[chave]
+            versao = self.versao_dados
+
+        valor = carregar()
+
+        with self._lock_cache:
+            # Uma escrita durante a leitura torna o valor obsoleto: não guarda
+            if versao == self.versao_dados:
+                self._cache[chave] = valor
+                if len(self._cache) > self.MAX_ITENS_CACHE:
+                    self._cache.popitem(last=False)
+        return valor
+
+    def invalidar_cache(self):
+        """Descarta as leituras em cache e avança versao_dados."""
+        with self._lock_cache:
+            self._cache.clear()
+            self.versao_dados += 1
 
     def _get_data_atual(self) -> str:
         """Retorna a data atual formatada."""
@@ -22,14 +62,49 @@ class ViagemController:
         """Retorna a hora atual formatada."""
         return datetime.now().strftime(self.FORMATO_HORA)
 
+    def obter_veiculos(self) -> List[Dict]:
+        """Retorna os veículos cadastrados na frota."""
+        try:
+            return self._em_cache(('veiculos',), self.db.obter_veiculos)
+        except Exception as e:
+            print(f"Erro ao obter veículos: {str(e)}")
+            return []
+
+    def cadastrar_veiculo(self, placa: str, descricao: str = None) -> Dict[str, any]:
+        """
+        Cadastra um veículo na frota.
+
+        Args:
+            placa: Placa do veículo (obrigatório, única)
+            descricao: Descrição livre (opcional)
+
+        Returns:
+            Dicionário com status, mensagem e id do veículo criado
+        """
+        placa = ''.join((placa or '').split()).upper()
+        if not placa:
+            return {'success': False, 'message': 'Placa não informada'}
+
+        try:
+            veiculo_id = self.db.cadastrar_veiculo(placa, (descricao or '').strip() or None)
+            self.invalidar_cache()
+            return {
+                'success': True,
+                'message': f'Veículo {placa} cadastrado com sucesso!',
+                'veiculo_id': veiculo_id
+            }
+        except sqlite3.IntegrityError:
+            return {'success': False, 'message': f'Placa {placa} já cadastrada'}
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Erro ao cadastrar veículo: {str(e)}'
+            }
+
     def obter_ultimo_km(self) -> Optional[int]:
-        """Obtém o último KM final registrado no histórico."""
+        """Obtém o último KM final registrado no histórico do veículo."""
         try:
-            historico = self.db.obter_viagens()
-            if historico:
-                ultima_viagem = historico[0]  # Ordenado por data DESC
-                return ultima_viagem.get('km_final')
-            return None
+            return self.db.obter_ultimo_km(self.veiculo_id)
         except Exception as e:
             print(f"Erro ao obter último KM: {str(e)}")
             return None
@@ -52,7 +127,8 @@ class ViagemController:
         hora_saida = hora_saida or self._get_hora_atual()
 
         try:
-            viagem_id = self.db.iniciar_viagem(data, hora_saida, km_inicial, destino)
+            viagem_id = self.db.iniciar_viagem(data, hora_saida, km_inicial, destino, self.veiculo_id)
+            self.invalidar_cache()
             return {
                 'success': True,
                 'message': 'Viagem iniciada com sucesso!',
@@ -64,6 +140,33 @@ class ViagemController:
                 'message': f'Erro ao iniciar viagem: {str(e)}'
             }
 
+    def importar_viagens(self, viagens: Iterable[Dict]) -> Dict[str, any]:
+        """
+        Importa viagens em lote (ex.: diários em papel ou outros sistemas).
+
+        Args:
+            viagens: Iterável (pode ser um gerador) de dicionários com data,
+                hora_saida, km_inicial, destino e, opcionalmente,
+                hora_chegada e km_final
+
+        Returns:
+            Dicionário com status, mensagem, total inserido e linhas rejeitadas
+        """
+        try:
+            resultado = self.db.inserir_viagens_em_lote(viagens, self.veiculo_id)
+            self.invalidar_cache()
+            return {
+                'success': True,
+                'message': (f"{resultado['inseridas']} viagens importadas, "
+                            f"{len(resultado['rejeitadas'])} rejeitadas"),
+                **resultado
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Erro ao importar viagens: {str(e)}'
+            }
+
     def finalizar_viagem(self, viagem_id: int, km_final: int,
                          hora_chegada: str = None) -> Dict[str, any]:
         """
@@ -80,8 +183,9 @@ class ViagemController:
         hora_chegada = hora_chegada or self._get_hora_atual()
 
         try:
-            success = self.db.finalizar_viagem(viagem_id, hora_chegada, km_final)
+            success = self.db.finalizar_viagem(viagem_id, hora_chegada, km_final, self.veiculo_id)
             if success:
+                self.invalidar_cache()
                 return {
                     'success': True,
                     'message': 'Viagem finalizada com sucesso!'
@@ -104,11 +208,122 @@ class ViagemController:
             Lista de dicionários com informações das viagens
         """
         try:
-            return self.db.obter_viagens()
+            return self._em_cache(('historico',), lambda: self.db.obter_viagens(self.veiculo_id))
         except Exception as e:
             print(f"Erro ao obter histórico: {str(e)}")
             return []
 
+    def obter_historico_pagina(self, after_key: Optional[tuple] = None,
+                               before_key: Optional[tuple] = None,
+                               limite: int = 50) -> Dict[str, any]:
+        """
+        Retorna uma página do histórico de viagens.
+
+        Args:
+            after_key: Chave de paginação para avançar (opcional)
+            before_key: Chave de paginação para voltar (opcional)
+            limite: Número de viagens por página
+
+        Returns:
+            Dicionário com as viagens da página e as chaves 'proxima' e
+            'anterior' (None quando não há página naquela direção)
+        """
+        try:
+            # Busca uma viagem a mais para saber se existe outra página
+            viagens = self._em_cache(
+                ('pagina', after_key, before_key, limite),
+                lambda: self.db.obter_viagens_pagina(after_key, limite + 1, before_key, self.veiculo_id)
+            )
+            ha_mais = len(viagens) > limite
+
+            if before_key is not None:
+                viagens = viagens[1:] if ha_mais else viagens
+                ha_anterior, ha_proxima = ha_mais, True
+            else:
+                viagens = viagens[:limite]
+                ha_anterior, ha_proxima = after_key is not None, ha_mais
+
+            return {
+                'viagens': viagens,
+                'anterior': self.db.chave_paginacao(viagens[0]) if viagens and ha_anterior else None,
+                'proxima': self.db.chave_paginacao(viagens[-1]) if viagens and ha_proxima else None
+            }
+        except Exception as e:
+            print(f"Erro ao obter página do histórico: {str(e)}")
+            return {'viagens': [], 'anterior': None, 'proxima': None}
+
+    def obter_resumo(self, granularidade: str = 'mes', agrupar: tuple = ('periodo', 'destino'),
+                     inicio: str = None, fim: str = None) -> List[Dict]:
+        """
+        Retorna km, viagens e minutos do veículo lidos das tabelas de resumo.
+
+        Args:
+            granularidade: 'dia' ou 'mes'
+            agrupar: Colunas do agrupamento ('periodo', 'destino')
+            inicio: Primeiro período incluído (YYYY-MM-DD ou YYYY-MM, opcional)
+            fim: Último período incluído (YYYY-MM-DD ou YYYY-MM, opcional)
+
+        Returns:
+            Lista de dicionários com as colunas de ``agrupar`` mais viagens,
+            finalizadas, km e minutos
+        """
+        agrupar = tuple(agrupar)
+        try:
+            return self._em_cache(
+                ('resumo', granularidade, agrupar, inicio, fim),
+                lambda: self.db.obter_resumo(granularidade, agrupar, self.veiculo_id, inicio, fim)
+            )
+        except Exception as e:
+            print(f"Erro ao obter resumo: {str(e)}")
+            return []
+
+    def obter_painel(self, max_destinos: int = 10) -> Dict[str, any]:
+        """
+        Retorna os indicadores do painel do veículo.
+
+        As agregações são GROUP BY do SQLite sobre as tabelas de resumo. O
+        resultado fica em cache sob o contador de alterações do banco, então
+        escritas feitas por outros controllers ou processos também renovam o
+        painel.
+
+        Args:
+            max_destinos: Quantidade de destinos no ranking
+
+        Returns:
+            Dicionário com 'total' (viagens, finalizadas, km, minutos),
+            'duracao_media_min' (None sem viagens finalizadas), 'km_por_mes',
+            'destinos' (os de maior km) e 'dias_semana' (7 itens, 0 = domingo)
+        """
+        try:
+            return self._em_cache(
+                ('painel', self.db.contador_alteracoes(), max_destinos),
+                lambda: self._montar_painel(
+                    self.db.obter_resumo('mes', (), self.veiculo_id),
+                    self.db.obter_resumo('mes', ('periodo',), self.veiculo_id),
+                    self.db.obter_resumo('mes', ('destino',), self.veiculo_id),
+                    self.db.obter_resumo('dia', ('dia_semana',), self.veiculo_id),
+                    max_destinos
+                )
+            )
+        except Exception as e:
+            print(f"Erro ao obter painel: {str(e)}")
+            return self._montar_painel([], [], [], [], max_destinos)
+
+    @staticmethod
+    def _montar_painel(total: List[Dict], meses: List[Dict], destinos: List[Dict],
+                       dias: List[Dict], max_destinos: int) -> Dict[str, any]:
+        """Organiza as linhas de resumo nos indicadores do painel."""
+        zerado = {'viagens': 0, 'finalizadas': 0, 'km': 0, 'minutos': 0}
+        total = total[0] if total else zerado
+        por_dia = {dia['dia_semana']: dia for dia in dias}
+        return {
+            'total': total,
+            'duracao_media_min': total['minutos'] / total['finalizadas'] if total['finalizadas'] else None,
+            'km_por_mes': meses,
+            'destinos': sorted(destinos, key=lambda d: (-d['km'], -d['viagens'], d['destino']))[:max_destinos],
+            'dias_semana': [por_dia.get(dia, {'dia_semana': dia, **zerado}) for dia in range(7)],
+        }
+
     def obter_viagem_ativa(self) -> Optional[Dict]:
         """
         Retorna a viagem ativa (não finalizada), se existir.
@@ -117,7 +332,7 @@ class ViagemController:
             Dicionário com informações da viagem ou None
         """
         try:
-            return self.db.obter_viagem_ativa()
+            return self._em_cache(('viagem_ativa',), lambda: self.db.obter_viagem_ativa(self.veiculo_id))
         except Exception as e:
             print(f"Erro ao obter viagem ativa: {str(e)}")
             return None
@@ -134,7 +349,9 @@ class ViagemController:
             Dicionário com status e mensagem da operação
         """
         try:
-            success = self.db.atualizar_viagem(viagem_id, **kwargs)
+            success = self.db.atualizar_viagem(viagem_id, somente_veiculo=self.veiculo_id, **kwargs)
+            if success:
+                self.invalidar_cache()
             return {
                 'success': success,
                 'message': 'Viagem atualizada com sucesso!' if success else 'Falha ao atualizar viagem'
@@ -145,54 +362,182 @@ class ViagemController:
                 'message': f'Erro ao atualizar viagem: {str(e)}'
             }
 
+    # Nome de exibição, extensão e tipo MIME de cada formato de exportação
+    FORMATOS_EXPORTACAO = {
+        'excel': ('Excel', 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+        'json': ('JSON', 'json', 'application/json'),
+        'csv': ('CSV', 'csv', 'text/csv'),
+        'parquet': ('Parquet', 'parquet', 'application/vnd.apache.parquet'),
+        'feather': ('Feather', 'feather', 'application/vnd.apache.arrow.file'),
+    }
+
+    # Tamanho aproximado de cada bloco gerado pelas exportações em texto
+    TAMANHO_BLOCO = 64 * 1024
+
     def exportar_historico(self, formato: str, caminho: str = None) -> Dict[str, any]:
         """
         Exporta o histórico de viagens para o formato especificado.
 
+        Sem ``caminho`` o arquivo é gerado em memória e devolvido em 'data';
+        com ``caminho`` ele é gravado em disco, bloco a bloco.
+
         Args:
-            formato: 'excel', 'json' ou 'csv'
+            formato: 'excel', 'json', 'csv', 'parquet' ou 'feather'
             caminho: Caminho do arquivo de destino (opcional)
 
         Returns:
-            Dicionário com status e mensagem da operação
+            Dicionário com status, mensagem, nome do arquivo, tipo MIME e
+            'data' (bytes) ou 'path' (arquivo gravado)
         """
         try:
-            historico = self.obter_historico()
-            if not historico:
-                return {'success': False, 'message': 'Nenhum dado para exportar'}
+            formato = formato.lower()
+            if formato not in self.FORMATOS_EXPORTACAO:
+                return {'success': False, 'message': 'Formato de exportação inválido'}
+            nome_formato, extensao, mime = self.FORMATOS_EXPORTACAO[formato]
 
-            df = pd.DataFrame(historico)
+            cursor_viagens = self.db.iter_viagens(veiculo_id=self.veiculo_id)
+            primeira = next(cursor_viagens, None)
+            if primeira is None:
+                return {'success': False, 'message': 'Nenhum dado para exportar'}
+            viagens = chain([primeira], cursor_viagens)
 
-            # Definir caminho padrão se não fornecido
-            if not caminho:
+            if caminho:
+                if formato == 'excel' and not caminho.endswith('.xlsx'):
+                    caminho = os.path.splitext(caminho)[0] + '.xlsx'
+                nome_arquivo = os.path.basename(caminho)
+            else:
                 data_hora = datetime.now().strftime("%Y%m%d_%H%M%S")
-                caminho = f"historico_viagens_{data_hora}.{formato.lower()}"
+                nome_arquivo = f"historico_viagens_{data_hora}.{extensao}"
 
-            # Configurações de codificação para Português-Brasil
-            encoding = 'utf-8-sig'  # UTF-8 com BOM para Excel e CSV
-
-            # Realizar a exportação conforme o formato
-            formato = formato.lower()
             if formato == 'excel':
-                if not caminho.endswith('.xlsx'):
-                    caminho = os.path.splitext(caminho)[0] + '.xlsx'
-                df.to_excel(caminho, index=False, engine='openpyxl')
-                return {'success': True, 'message': f'Dados exportados para Excel: {caminho}', 'path': caminho}
-
-            elif formato == 'json':
-                df.to_json(caminho, orient='records', indent=4, force_ascii=False)
-                return {'success': True, 'message': f'Dados exportados para JSON: {caminho}', 'path': caminho}
-
-            elif formato == 'csv':
-                df.to_csv(caminho, index=False, encoding=encoding, sep=';', decimal=',')
-                return {'success': True, 'message': f'Dados exportados para CSV: {caminho}', 'path': caminho}
+                saida = caminho or io.BytesIO()
+                ExportadorExcel.exportar(viagens, saida)
+                blocos = None if caminho else [saida.getvalue()]
+            elif formato in ('parquet', 'feather'):
+                # Lê o banco em lotes de tuplas, sem passar por dicionários
+                cursor_viagens.close()
+                from utils.formato_colunar import FormatoColunar
+                saida = caminho or io.BytesIO()
+                lotes = self.db.iter_lotes(FormatoColunar.COLUNAS, ordenar=False, veiculo_id=self.veiculo_id)
+                FormatoColunar.exportar(lotes, saida, formato)
+                blocos = None if caminho else [saida.getvalue()]
+            else:
+                blocos = self.exportar_em_blocos(formato, viagens)
+                if caminho:
+                    with open(caminho, 'wb') as f:
+                        for bloco in blocos:
+                            f.write(bloco)
 
+            resultado = {
+                'success': True,
+                'message': f'Dados exportados para {nome_formato}: {nome_arquivo}',
+                'file_name': nome_arquivo,
+                'mime': mime
+            }
+            if caminho:
+                resultado['path'] = caminho
             else:
-                return {'success': False, 'message': 'Formato de exportação inválido'}
+                resultado['data'] = b''.join(blocos)
+            return resultado
 
+        except ImportError:
+            return {'success': False, 'message': 'Exportação colunar requer o pacote pyarrow'}
         except Exception as e:
             return {'success': False, 'message': f'Erro ao exportar dados: {str(e)}'}
 
+    def importar_arquivo_colunar(self, origem, formato: str) -> Dict[str, any]:
+        """
+        Importa viagens de um arquivo Parquet ou Feather em uma única transação.
+
+        Os lotes do arquivo são validados coluna a coluna; linhas inválidas
+        são rejeitadas sem abortar a importação.
+
+        Args:
+            origem: Caminho ou objeto binário do arquivo
+            formato: 'parquet' ou 'feather'
+
+        Returns:
+            Dicionário com status, mensagem, total inserido e linhas rejeitadas
+        """
+        try:
+            from utils.formato_colunar import FormatoColunar
+
+            rejeitadas = []
+
+            def linhas_validas():
+                deslocamento = 0
+                for lote in FormatoColunar.ler_lotes(origem, formato.lower()):
+                    validas, rejeicoes = FormatoColunar.validar_lote(lote, deslocamento)
+                    rejeitadas.extend(rejeicoes)
+                    deslocamento += lote.num_rows
+                    yield from validas
+
+            inseridas = self.db.inserir_linhas_validadas(linhas_validas(), self.veiculo_id)
+            self.invalidar_cache()
+            return {
+                'success': True,
+                'message': f"{inseridas} viagens importadas, {len(rejeitadas)} rejeitadas",
+                'inseridas': inseridas,
+                'rejeitadas': rejeitadas
+            }
+        except ImportError:
+            return {'success': False, 'message': 'Importação colunar requer o pacote pyarrow'}
+        except Exception as e:
+            return {'success': False, 'message': f'Erro ao importar arquivo: {str(e)}'}
+
+    def exportar_em_blocos(self, formato: str, viagens: Optional[Iterable[Dict]] = None) -> Iterator[bytes]:
+        """
+        Gera a exportação em CSV ou JSON como blocos de bytes, lendo o banco aos poucos.
+
+        Args:
+            formato: 'json' ou 'csv'
+            viagens: Viagens a exportar (padrão: todo o histórico do veículo via iter_viagens)
+
+        Yields:
+            Blocos de aproximadamente TAMANHO_BLOCO bytes
+        """
+        viagens = self.db.iter_viagens(veiculo_id=self.veiculo_id) if viagens is None else viagens
+        if formato == 'csv':
+            # UTF-8 com BOM para o Excel reconhecer a acentuação
+            return self._blocos_texto(self._linhas_csv(viagens), 'utf-8-sig')
+        if formato == 'json':
+            return self._blocos_texto(self._linhas_json(viagens), 'utf-8')
+        raise ValueError(f"Formato sem exportação em blocos: {formato}")
+
+    def _blocos_texto(self, partes: Iterable[str], encoding: str) -> Iterator[bytes]:
+        """Codifica e agrupa pedaços de texto em blocos de bytes."""
+        codificador = codecs.getincrementalencoder(encoding)()
+        buffer, tamanho = [], 0
+        for parte in partes:
+            buffer.append(parte)
+            tamanho += len(parte)
+            if tamanho >= self.TAMANHO_BLOCO:
+                yield codificador.encode(''.join(buffer))
+                buffer, tamanho = [], 0
+        yield codificador.encode(''.join(buffer), final=True)
+
+    @staticmethod
+    def _linhas_csv(viagens: Iterable[Dict]) -> Iterator[str]:
+        """Converte as viagens em linhas CSV (separador ';'), começando pelo cabeçalho."""
+        buffer = io.StringIO()
+        writer = None
+        for viagem in viagens:
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(viagem.keys()), delimiter=';')
+                writer.writeheader()
+            writer.writerow(viagem)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    @staticmethod
+    def _linhas_json(viagens: Iterable[Dict]) -> Iterator[str]:
+        """Converte as viagens em uma lista JSON, um registro por vez."""
+        yield '['
+        for indice, viagem in enumerate(viagens):
+            registro = json.dumps(viagem, ensure_ascii=False, indent=4)
+            yield (',\n    ' if indice else '\n    ') + registro.replace('\n', '\n    ')
+        yield '\n]'
 
 # from datetime import datetime
 # from typing import Dict, List, Optional
@@ -1,15 +1,49 @@
 """
 Pacote database - Gerencia a persistência de dados do Diário de Bordo
 
-Exporta a classe DatabaseManager para uso externo e realiza configurações iniciais.
+Exporta a classe DatabaseManager para uso externo e uma fábrica preguiçosa
+que compartilha uma instância por caminho de banco. Importar o pacote não
+abre nenhum arquivo. Com a variável de ambiente DIARIO_BORDO_FRAGMENTACAO
+('ano' ou 'mes') a fábrica usa o armazenamento fragmentado por período.
+O SQLite anexa no máximo 10 fragmentos por conexão: além disso, os períodos
+mais antigos são consolidados no banco principal (ver database.fragmentos).
 """
 
-from .database import DatabaseManager
+import os
+import threading
+from typing import Dict, Optional
 
-__all__ = ['DatabaseManager']
+from .database import DatabaseManager, DEFAULT_DB_PATH, VEICULO_PADRAO
+from .fragmentos import DatabaseManagerFragmentado
+from .pool import ConnectionPool
+from .pragmas import PERFIS
 
-# Configurações iniciais (opcional)
-DEFAULT_DB_PATH = 'data/diario_bordo.db'
+__all__ = ['DatabaseManager', 'DatabaseManagerFragmentado', 'ConnectionPool', 'PERFIS',
+           'DEFAULT_DB_PATH', 'VEICULO_PADRAO', 'obter_db_manager', 'init_db']
+
+_instancias: Dict[str, DatabaseManager] = {}
+_lock = threading.Lock()
+
+
+def obter_db_manager(db_path: Optional[str] = None) -> DatabaseManager:
+    """
+    Retorna o DatabaseManager compartilhado para o caminho informado.
+
+    A instância é criada na primeira chamada e o banco só é aberto na
+    primeira consulta. DIARIO_BORDO_FRAGMENTACAO escolhe o modo fragmentado.
+
+    Args:
+        db_path: Caminho para o arquivo do banco (padrão: DEFAULT_DB_PATH)
+    """
+    db_path = db_path or DEFAULT_DB_PATH
+    with _lock:
+        if db_path not in _instancias:
+            granularidade = os.environ.get('DIARIO_BORDO_FRAGMENTACAO')
+            if granularidade:
+                _instancias[db_path] = DatabaseManagerFragmentado(db_path, granularidade=granularidade)
+            else:
+                _instancias[db_path] = DatabaseManager(db_path)
+        return _instancias[db_path]
 
 
 def init_db(db_path: str = DEFAULT_DB_PATH):
@@ -19,9 +53,13 @@ def init_db(db_path: str = DEFAULT_DB_PATH):
     Args:
         db_path: Caminho para o arquivo do banco de dados
     """
-    db = DatabaseManager(db_path)
+    db = obter_db_manager(db_path)
+    db._initialize_db()
     return db
 
 
-# Cria uma instância global (opcional)
-db_manager = DatabaseManager(DEFAULT_DB_PATH)
\ No newline at end of file
+def __getattr__(nome):
+    # Compatibilidade: ``db_manager`` era criado na importação do pacote
+    if nome == 'db_manager':
+        return obter_db_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
@@ -0,0 +1,28 @@
+"""
+Comandos de manutenção do banco do Diário de Bordo.
+
+Uso: python -m database reconstruir-resumos [caminho_do_banco]
+"""
+
+import argparse
+
+from . import obter_db_manager
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m database')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    reconstruir = comandos.add_parser('reconstruir-resumos',
+                                      help='recalcula as tabelas de resumo a partir das viagens')
+    reconstruir.add_argument('caminho', nargs='?', help='banco de dados (padrão: DIARIO_BORDO_DB)')
+    argumentos = parser.parse_args()
+
+    if argumentos.comando == 'reconstruir-resumos':
+        db = obter_db_manager(argumentos.caminho)
+        for resumo, linhas in db.reconstruir_resumos().items():
+            print(f"{resumo}: {linhas} linhas")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
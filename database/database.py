@@ -1,52 +1,294 @@
+import os
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Optional
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.request import pathname2url
+
+from utils.data_utils import FORMATO_DATA, FORMATO_HORA, DataUtils, Sanitizador, Validador
+
+from . import resumos
+from .migracoes import migrar, versao_schema
+from .pool import ConnectionPool
+from .pragmas import PERFIL_PADRAO, aplicar_pragmas, ler_pragmas, resolver_perfil
+
+# Caminho único do banco, compartilhado pelo pacote e pelo controller
+CAMINHO_PADRAO = os.path.join('data', 'diario_bordo.db')
+DEFAULT_DB_PATH = os.environ.get('DIARIO_BORDO_DB', CAMINHO_PADRAO)
+
+# Caminho usado pelo controller antes de CAMINHO_PADRAO; as viagens desse
+# arquivo são copiadas para o caminho novo na primeira abertura
+CAMINHO_LEGADO = 'diario_bordo.db'
+
+# Veículo que recebe as viagens quando nenhum é informado (bancos de um só veículo)
+VEICULO_PADRAO = 1
+
+# Marca o cache do odômetro como ainda não consultado (None é um valor válido)
+_NAO_CARREGADO = object()
 
 class DatabaseManager:
     """Classe para gerenciar todas as operações do banco de dados."""
     
-    def __init__(self, db_path: str = 'diario_bordo.db'):
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, pool_size: int = 5,
+                 perfil: Union[str, Dict] = PERFIL_PADRAO):
         """
         Inicializa o gerenciador do banco de dados.
+
+        Nenhum arquivo é aberto aqui: a conexão e a migração do schema
+        acontecem na primeira consulta.
         
         Args:
             db_path: Caminho para o arquivo do banco de dados SQLite
+            pool_size: Número máximo de conexões mantidas no pool
+            perfil: Nome do perfil de pragmas ('durable', 'fast',
+                'readonly-analytics') ou dicionário pragma -> valor
         """
         self.db_path = db_path
-        self._initialize_db()
+        self.pragmas = resolver_perfil(perfil)
+        # Último KM final por veículo (None = frota inteira)
+        self._ultimo_km: Dict[Optional[int], Optional[int]] = {}
+        self._pool = ConnectionPool(self._criar_conexao, pool_size)
+        self._schema_pronto = False
+        self._lock_schema = threading.Lock()
+        # Conexão só de leitura de PRAGMA data_version (ver contador_alteracoes)
+        self._conexao_contador: Optional[sqlite3.Connection] = None
+        self._lock_contador = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Fecha as conexões mantidas pelo pool."""
+        self._pool.close()
+        with self._lock_contador:
+            if self._conexao_contador is not None:
+                self._conexao_contador.close()
+                self._conexao_contador = None
+
+    def contador_alteracoes(self) -> int:
+        """
+        Retorna um número que muda a cada commit que altera o banco.
+
+        Usa ``PRAGMA data_version`` de uma conexão própria que nunca escreve:
+        o valor muda quando qualquer outra conexão (do pool ou de outro
+        processo) confirma uma alteração. Serve de chave para caches de
+        leitura; o custo é o de um pragma, sem consultar tabelas.
+        """
+        if not self._schema_pronto:
+            self._initialize_db()
+        with self._lock_contador:
+            if self._conexao_contador is None:
+                self._conexao_contador = sqlite3.connect(self.db_path, check_same_thread=False)
+            return self._conexao_contador.execute('PRAGMA data_version').fetchone()[0]
+
+    def estatisticas_pool(self) -> Dict[str, int]:
+        """Retorna os contadores de uso do pool de conexões."""
+        return self._pool.estatisticas()
+
+    def obter_pragmas(self) -> Dict[str, Union[int, str]]:
+        """
+        Retorna os valores de pragmas efetivamente em vigor nas conexões.
+
+        O SQLite pode ignorar um pedido (ex.: WAL em banco em memória), por
+        isso os valores são lidos de volta em vez de copiados do perfil.
+        """
+        with self._get_connection() as conn:
+            return ler_pragmas(conn)
 
     def _initialize_db(self):
-        """Cria o banco de dados e as tabelas se não existirem."""
+        """Cria ou migra o schema do banco (uma leitura de pragma se já estiver atualizado)."""
+        with self._lock_schema:
+            if self._schema_pronto:
+                return
+            diretorio = os.path.dirname(self.db_path)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+            if os.path.abspath(self.db_path) == os.path.abspath(CAMINHO_PADRAO):
+                self._importar_banco_legado()
+            with self._conexao_manutencao() as conn:
+                migrar(conn)
+            self._schema_pronto = True
+
+    @contextmanager
+    def _conexao_manutencao(self):
+        """
+        Conexão para criar, migrar ou reconstruir o schema.
+
+        No perfil 'readonly-analytics' (query_only) as conexões do pool não
+        escrevem; a manutenção usa então uma conexão própria, fora do pool,
+        com query_only desligado.
+        """
+        if str(self.pragmas.get('query_only', 'OFF')).upper() in ('OFF', '0', 'FALSE', 'NO'):
+            with self._pool.conexao() as conn:
+                yield conn
+            return
+        conn = self._criar_conexao()
+        try:
+            conn.execute('PRAGMA query_only = OFF')
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _possui_viagens(caminho: str) -> bool:
+        """Indica se o arquivo é um banco com ao menos uma viagem (sem criá-lo nem alterá-lo)."""
+        if not os.path.isfile(caminho) or os.path.getsize(caminho) == 0:
+            return False
+        try:
+            conn = sqlite3.connect(f'file:{pathname2url(os.path.abspath(caminho))}?mode=ro', uri=True)
+            try:
+                return conn.execute('SELECT EXISTS (SELECT 1 FROM viagens)').fetchone()[0] == 1
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _banco_novo(caminho: str) -> bool:
+        """
+        Indica se o arquivo ainda não foi inicializado por esta versão.
+
+        Vale para arquivo inexistente ou com user_version 0; um banco que não
+        pode ser lido não conta como novo, para nunca ser sobrescrito.
+        """
+        if not os.path.exists(caminho):
+            return True
+        try:
+            conn = sqlite3.connect(f'file:{pathname2url(os.path.abspath(caminho))}?mode=ro', uri=True)
+            try:
+                return versao_schema(conn) == 0
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return False
+
+    def _importar_banco_legado(self):
+        """
+        Copia o banco de CAMINHO_LEGADO para o caminho padrão.
+
+        Só acontece quando o arquivo antigo tem viagens e o novo ainda não foi
+        inicializado (user_version 0); o arquivo antigo é mantido. A migração
+        que vem em seguida grava a versão, então a cópia acontece uma vez só e
+        nunca sobrescreve um banco em uso, mesmo que ele não tenha viagens.
+        """
+        if not self._banco_novo(self.db_path) or not self._possui_viagens(CAMINHO_LEGADO):
+            return
+        origem = sqlite3.connect(CAMINHO_LEGADO)
+        destino = sqlite3.connect(self.db_path)
+        try:
+            origem.backup(destino)
+        finally:
+            destino.close()
+            origem.close()
+        print(f"Aviso: viagens de {os.path.abspath(CAMINHO_LEGADO)} copiadas para "
+              f"{os.path.abspath(self.db_path)}; o arquivo antigo não é mais usado")
+
+    @staticmethod
+    def _data_iso(data: str) -> str:
+        """Converte DD/MM/YYYY para a chave ordenável YYYY-MM-DD."""
+        dia = DataUtils.converter_data(data)
+        if dia is None:
+            raise ValueError(f"Data inválida: {data}")
+        return dia.isoformat()
+
+    @staticmethod
+    def _normalizar_data(data: str) -> Tuple[str, str]:
+        """
+        Retorna a data na forma canônica DD/MM/YYYY e a chave YYYY-MM-DD.
+
+        Entradas não canônicas aceitas pelo parser (ex.: 1/2/2024) não são
+        gravadas como vieram: ordenação e colunas geradas dependem do formato fixo.
+        """
+        dia = DataUtils.converter_data(data)
+        if dia is None:
+            raise ValueError(f"Data inválida: {data}")
+        return dia.strftime(FORMATO_DATA), dia.isoformat()
+
+    @staticmethod
+    def _normalizar_hora(hora: str) -> str:
+        """Retorna o horário na forma canônica HH:MM (ex.: 8:05 vira 08:05)."""
+        horario = DataUtils.converter_hora(hora)
+        if horario is None:
+            raise ValueError(f"Horário inválido: {hora}")
+        return horario.strftime(FORMATO_HORA)
+
+    @staticmethod
+    def _filtro_veiculo(veiculo_id: Optional[int], conector: str = 'WHERE') -> Tuple[str, Tuple]:
+        """Trecho SQL e parâmetros que restringem a consulta a um veículo (None = frota inteira)."""
+        if veiculo_id is None:
+            return '', ()
+        return f'{conector} veiculo_id = ?', (veiculo_id,)
+
+    def _criar_conexao(self) -> sqlite3.Connection:
+        """Abre uma nova conexão com o banco de dados para o pool."""
+        # O pool garante uso exclusivo, mas a conexão pode mudar de thread entre reruns
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        aplicar_pragmas(conn, self.pragmas)
+        return conn
+
+    @contextmanager
+    def _get_connection(self):
+        """Empresta uma conexão do pool, confirmando ou desfazendo a transação ao final."""
+        if not self._schema_pronto:
+            self._initialize_db()
+        with self._pool.conexao() as conn:
+            self._preparar_conexao(conn)
+            with conn:
+                yield conn
+
+    # Pontos de extensão para armazenamentos que dividem a tabela viagens
+    # (ver database.fragmentos). As leituras sempre usam o nome ``viagens``.
+
+    def _preparar_conexao(self, conn: sqlite3.Connection):
+        """Ajusta uma conexão recém-emprestada do pool antes do uso."""
+
+    def _tabela_escrita(self, conn: sqlite3.Connection, data_iso: str) -> str:
+        """Tabela que recebe uma nova viagem da data informada."""
+        return 'viagens'
+
+    def _grupos_escrita(self, conn: sqlite3.Connection,
+                        linhas: Iterable[Tuple]) -> Iterator[Tuple[str, Iterable[Tuple]]]:
+        """Divide linhas de inserção (data_iso na 2ª posição) por tabela de destino."""
+        yield 'viagens', linhas
+
+    def _tabela_da_viagem(self, viagem_id: int) -> Optional[str]:
+        """Tabela que contém a viagem (None se ela não pode estar em nenhuma)."""
+        return 'viagens'
+
+    def _verificar_veiculo(self, conn: sqlite3.Connection, veiculo_id: int):
+        """Validação extra do veículo de uma escrita (a chave estrangeira já cobre o caso comum)."""
+
+    def cadastrar_veiculo(self, placa: str, descricao: Optional[str] = None) -> int:
+        """
+        Cadastra um veículo da frota.
+
+        Args:
+            placa: Placa do veículo (única)
+            descricao: Descrição livre (modelo, setor etc.)
+
+        Returns:
+            ID do veículo criado
+        """
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            # Executa o schema SQL
-            cursor.executescript('''
-                CREATE TABLE IF NOT EXISTS viagens (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    data TEXT NOT NULL,
-                    hora_saida TEXT NOT NULL,
-                    km_inicial INTEGER NOT NULL,
-                    destino TEXT NOT NULL,
-                    hora_chegada TEXT,
-                    km_final INTEGER,
-                    criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-                
-                CREATE TRIGGER IF NOT EXISTS atualiza_timestamp
-                AFTER UPDATE ON viagens
-                FOR EACH ROW
-                BEGIN
-                    UPDATE viagens SET atualizado_em = CURRENT_TIMESTAMP WHERE id = OLD.id;
-                END;
-            ''')
+            cursor.execute(
+                'INSERT INTO veiculos (placa, descricao) VALUES (?, ?)',
+                (placa, descricao)
+            )
             conn.commit()
+            return cursor.lastrowid
 
-    def _get_connection(self):
-        """Retorna uma conexão com o banco de dados."""
-        return sqlite3.connect(self.db_path)
+    def obter_veiculos(self) -> List[Dict]:
+        """Retorna os veículos cadastrados, em ordem de placa."""
+        with self._get_connection() as conn:
+            return [dict(row) for row in conn.execute('SELECT * FROM veiculos ORDER BY placa')]
 
-    def iniciar_viagem(self, data: str, hora_saida: str, km_inicial: int, destino: str) -> int:
+    def iniciar_viagem(self, data: str, hora_saida: str, km_inicial: int, destino: str,
+                       veiculo_id: int = VEICULO_PADRAO) -> int:
         """
         Registra uma nova viagem no banco de dados.
         
@@ -55,23 +297,141 @@ class DatabaseManager:
             hora_saida: Hora no formato HH:MM
             km_inicial: Quilometragem inicial
             destino: Destino da viagem
+            veiculo_id: Veículo que fez a viagem
             
         Returns:
             ID da viagem criada
         """
+        data, data_iso = self._normalizar_data(data)
+        hora_saida = self._normalizar_hora(hora_saida)
         with self._get_connection() as conn:
+            tabela = self._tabela_escrita(conn, data_iso)
+            self._verificar_veiculo(conn, veiculo_id)
             cursor = conn.cursor()
             cursor.execute(
-                '''
-                INSERT INTO viagens (data, hora_saida, km_inicial, destino)
-                VALUES (?, ?, ?, ?)
+                f'''
+                INSERT INTO {tabela} (veiculo_id, data, data_iso, hora_saida, km_inicial, destino)
+                VALUES (?, ?, ?, ?, ?, ?)
                 ''',
-                (data, hora_saida, km_inicial, destino)
+                (veiculo_id, data, data_iso, hora_saida, km_inicial, destino)
             )
+            resumos.somar(conn, tabela, 'id = ?', (cursor.lastrowid,))
             conn.commit()
             return cursor.lastrowid
 
-    def finalizar_viagem(self, viagem_id: int, hora_chegada: str, km_final: int) -> bool:
+    def inserir_viagens_em_lote(self, viagens: Iterable[Dict],
+                                veiculo_id: int = VEICULO_PADRAO) -> Dict[str, any]:
+        """
+        Insere várias viagens em uma única transação com executemany.
+
+        As linhas são validadas à medida que são consumidas, então ``viagens``
+        pode ser um gerador; linhas inválidas são rejeitadas sem abortar o lote.
+
+        Args:
+            viagens: Dicionários com data, hora_saida, km_inicial, destino e,
+                opcionalmente, hora_chegada e km_final
+            veiculo_id: Veículo dono de todas as viagens do lote
+
+        Returns:
+            Dicionário com o total de viagens inseridas e a lista de rejeições
+            ({'linha': índice na entrada, 'erro': motivo})
+        """
+        rejeitadas = []
+        inseridas = 0
+
+        def linhas_validas():
+            nonlocal inseridas
+            for indice, viagem in enumerate(viagens):
+                try:
+                    linha = self._validar_viagem_lote(viagem)
+                except (ValueError, TypeError) as e:
+                    rejeitadas.append({'linha': indice, 'erro': str(e)})
+                    continue
+                inseridas += 1
+                yield linha
+
+        self.inserir_linhas_validadas(linhas_validas(), veiculo_id)
+        return {'inseridas': inseridas, 'rejeitadas': rejeitadas}
+
+    def inserir_linhas_validadas(self, linhas: Iterable[Tuple],
+                                 veiculo_id: int = VEICULO_PADRAO) -> int:
+        """
+        Insere linhas já validadas em uma única transação com executemany.
+
+        Usado por importações que validam os dados por conta própria (ex.:
+        validação vetorizada de arquivos colunares).
+
+        Args:
+            linhas: Tuplas (data, data_iso, hora_saida, km_inicial, destino,
+                hora_chegada, km_final)
+            veiculo_id: Veículo dono de todas as linhas
+
+        Returns:
+            Número de linhas inseridas
+        """
+        inseridas = 0
+        with self._get_connection() as conn:
+            self._verificar_veiculo(conn, veiculo_id)
+            for tabela, grupo in self._grupos_escrita(conn, linhas):
+                # Ids são crescentes: as linhas novas são as de id acima do maior atual
+                ultimo_id = conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {tabela}').fetchone()[0]
+                cursor = conn.executemany(
+                    f'''
+                    INSERT INTO {tabela} (data, data_iso, hora_saida, km_inicial, destino, hora_chegada,
+                                          km_final, veiculo_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, {int(veiculo_id)})
+                    ''',
+                    grupo
+                )
+                inseridas += max(cursor.rowcount, 0)
+                resumos.somar(conn, tabela, 'id > ?', (ultimo_id,))
+            ultimo_km = self._consultar_ultimo_km(conn, veiculo_id)
+            conn.commit()
+            self._guardar_ultimo_km(veiculo_id, ultimo_km)
+            return inseridas
+
+    @staticmethod
+    def _validar_viagem_lote(viagem: Dict) -> Tuple:
+        """Valida uma viagem do lote e retorna a tupla de parâmetros do INSERT."""
+        try:
+            data, hora_saida = viagem['data'], viagem['hora_saida']
+            km_inicial, destino = viagem['km_inicial'], viagem['destino']
+        except KeyError as e:
+            raise ValueError(f"Campo obrigatório ausente: {e.args[0]}")
+
+        valido, saida = DataUtils.validar_data_hora(data, hora_saida)
+        if not valido:
+            raise ValueError('Data ou horário de saída inválidos')
+
+        valido_km, km_inicial = Validador.validar_km(km_inicial)
+        if not valido_km:
+            raise ValueError('Quilometragem inicial inválida')
+
+        destino = Sanitizador.sanitizar_destino(str(destino or ''))
+        if not destino:
+            raise ValueError('Destino não informado')
+
+        hora_chegada, km_final = viagem.get('hora_chegada'), viagem.get('km_final')
+        if (hora_chegada is None) != (km_final is None):
+            raise ValueError('Hora de chegada e KM final devem ser informados juntos')
+
+        if hora_chegada is not None:
+            chegada = DataUtils.converter_hora(hora_chegada)
+            if chegada is None:
+                raise ValueError('Horário de chegada inválido')
+            hora_chegada = chegada.strftime(FORMATO_HORA)
+            valido_km, km_final = Validador.validar_km(km_final)
+            if not valido_km:
+                raise ValueError('Quilometragem final inválida')
+            if not Validador.validar_km_viagem(km_inicial, km_final):
+                raise ValueError('KM final menor que KM inicial')
+
+        # Formas canônicas: entradas como 8:05 ou 1/2/2024 não são gravadas como vieram
+        return (saida.strftime(FORMATO_DATA), saida.strftime('%Y-%m-%d'), saida.strftime(FORMATO_HORA),
+                km_inicial, destino, hora_chegada, km_final)
+
+    def finalizar_viagem(self, viagem_id: int, hora_chegada: str, km_final: int,
+                         veiculo_id: Optional[int] = None) -> bool:
         """
         Finaliza uma viagem existente.
         
@@ -79,84 +439,330 @@ class DatabaseManager:
             viagem_id: ID da viagem a ser finalizada
             hora_chegada: Hora de chegada no formato HH:MM
             km_final: Quilometragem final
+            veiculo_id: Se informado, só finaliza a viagem se ela for deste veículo
             
         Returns:
             True se a operação foi bem-sucedida
         """
+        tabela = self._tabela_da_viagem(viagem_id)
+        if tabela is None:
+            return False
+
+        hora_chegada = self._normalizar_hora(hora_chegada)
+        filtro, parametros = self._filtro_veiculo(veiculo_id, 'AND')
         with self._get_connection() as conn:
+            resumos.somar(conn, tabela, f'id = ? {filtro}', (viagem_id, *parametros), -1)
             cursor = conn.cursor()
             cursor.execute(
-                '''
-                UPDATE viagens
-                SET hora_chegada = ?, km_final = ?
-                WHERE id = ?
+                f'''
+                UPDATE {tabela}
+                SET hora_chegada = ?, km_final = ?, atualizado_em = CURRENT_TIMESTAMP
+                WHERE id = ? {filtro}
                 ''',
-                (hora_chegada, km_final, viagem_id)
+                (hora_chegada, km_final, viagem_id, *parametros)
             )
+            if cursor.rowcount == 0:
+                return False
+            resumos.somar(conn, tabela, 'id = ?', (viagem_id,))
+            veiculo_viagem = self._veiculo_da_viagem(conn, viagem_id)
+            ultimo_km = self._consultar_ultimo_km(conn, veiculo_viagem)
             conn.commit()
-            return cursor.rowcount > 0
+            self._guardar_ultimo_km(veiculo_viagem, ultimo_km)
+            return True
 
-    def obter_viagens(self) -> List[Dict]:
+    @staticmethod
+    def _veiculo_da_viagem(conn: sqlite3.Connection, viagem_id: int) -> Optional[int]:
+        """Retorna o veículo de uma viagem, ou None se ela não existir."""
+        row = conn.execute('SELECT veiculo_id FROM viagens WHERE id = ?', (viagem_id,)).fetchone()
+        return row[0] if row else None
+
+    def obter_viagens(self, veiculo_id: Optional[int] = None) -> List[Dict]:
         """
         Retorna todas as viagens registradas.
+
+        Args:
+            veiculo_id: Restringe a um veículo (None = frota inteira)
         
         Returns:
             Lista de dicionários com informações das viagens
         """
+        return list(self.iter_viagens(veiculo_id=veiculo_id))
+
+    def iter_viagens(self, batch_size: int = 500, veiculo_id: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Percorre todas as viagens em lotes, sem carregar a tabela inteira.
+
+        A conexão fica emprestada do pool até o gerador ser esgotado ou fechado.
+
+        Args:
+            batch_size: Número de linhas lidas do cursor por vez (fetchmany)
+            veiculo_id: Restringe a um veículo (None = frota inteira)
+
+        Yields:
+            Dicionário com informações de cada viagem, da mais recente à mais antiga
+        """
+        filtro, parametros = self._filtro_veiculo(veiculo_id)
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f'SELECT * FROM viagens {filtro} ORDER BY data_iso DESC, hora_saida DESC, id DESC',
+                parametros
+            )
+            while True:
+                lote = cursor.fetchmany(batch_size)
+                if not lote:
+                    break
+                for row in lote:
+                    yield dict(row)
+
+    def iter_lotes(self, colunas: List[str], batch_size: int = 10000,
+                   ordenar: bool = True, veiculo_id: Optional[int] = None) -> Iterator[List[Tuple]]:
+        """
+        Percorre o histórico em lotes de tuplas, para consumidores colunares.
+
+        Args:
+            colunas: Colunas de viagens a ler, nesta ordem
+            batch_size: Número de linhas por lote
+            ordenar: Se False, lê na ordem de id (varredura sequencial da
+                tabela), mais rápida para exportações completas
+            veiculo_id: Restringe a um veículo (None = frota inteira)
+
+        Yields:
+            Listas de tuplas com os valores de ``colunas``
+        """
+        conhecidas = {row['name'] for row in self._colunas_viagens()}
+        desconhecidas = set(colunas) - conhecidas
+        if desconhecidas:
+            raise ValueError(f"Colunas desconhecidas: {', '.join(sorted(desconhecidas))}")
+
         with self._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM viagens ORDER BY data DESC, hora_saida DESC')
+            cursor.row_factory = None
+            ordem = 'data_iso DESC, hora_saida DESC, id DESC' if ordenar else 'id'
+            filtro, parametros = self._filtro_veiculo(veiculo_id)
+            cursor.execute(f"SELECT {', '.join(colunas)} FROM viagens {filtro} ORDER BY {ordem}", parametros)
+            while True:
+                lote = cursor.fetchmany(batch_size)
+                if not lote:
+                    break
+                yield lote
+
+    def _colunas_viagens(self) -> List[sqlite3.Row]:
+        """Retorna as colunas (inclusive geradas) da tabela viagens."""
+        with self._get_connection() as conn:
+            return conn.execute('PRAGMA table_xinfo(viagens)').fetchall()
+
+    def obter_viagens_pagina(self, after_key: Optional[Tuple] = None, limit: int = 50,
+                             before_key: Optional[Tuple] = None,
+                             veiculo_id: Optional[int] = None) -> List[Dict]:
+        """
+        Retorna uma página do histórico usando paginação por chave (keyset).
+
+        A página é localizada pelo índice (data_iso, hora_saida, id), ou por
+        (veiculo_id, data_iso, hora_saida, id) quando há veículo, então o
+        custo depende apenas de ``limit`` e não da posição no histórico.
+
+        Args:
+            after_key: Chave da última viagem da página atual (próxima página)
+            limit: Número máximo de viagens retornadas
+            before_key: Chave da primeira viagem da página atual (página anterior)
+            veiculo_id: Restringe a um veículo (None = frota inteira)
+
+        Returns:
+            Lista de dicionários, sempre da viagem mais recente para a mais antiga
+        """
+        if after_key is not None and before_key is not None:
+            raise ValueError("Informe after_key ou before_key, não ambos")
+
+        filtro, parametros = self._filtro_veiculo(veiculo_id, 'AND')
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            if before_key is not None:
+                cursor.execute(
+                    f'''
+                    SELECT * FROM viagens
+                    WHERE (data_iso, hora_saida, id) > (?, ?, ?) {filtro}
+                    ORDER BY data_iso ASC, hora_saida ASC, id ASC
+                    LIMIT ?
+                    ''',
+                    (*before_key, *parametros, limit)
+                )
+                return [dict(row) for row in reversed(cursor.fetchall())]
+
+            if after_key is not None:
+                cursor.execute(
+                    f'''
+                    SELECT * FROM viagens
+                    WHERE (data_iso, hora_saida, id) < (?, ?, ?) {filtro}
+                    ORDER BY data_iso DESC, hora_saida DESC, id DESC
+                    LIMIT ?
+                    ''',
+                    (*after_key, *parametros, limit)
+                )
+            else:
+                filtro, parametros = self._filtro_veiculo(veiculo_id)
+                cursor.execute(
+                    f'SELECT * FROM viagens {filtro} ORDER BY data_iso DESC, hora_saida DESC, id DESC LIMIT ?',
+                    (*parametros, limit)
+                )
             return [dict(row) for row in cursor.fetchall()]
 
-    def obter_viagem_ativa(self) -> Optional[Dict]:
+    @staticmethod
+    def chave_paginacao(viagem: Dict) -> Tuple[str, str, int]:
+        """Retorna a chave de ordenação de uma viagem usada na paginação."""
+        return viagem['data_iso'], viagem['hora_saida'], viagem['id']
+
+    def obter_viagem_ativa(self, veiculo_id: Optional[int] = None) -> Optional[Dict]:
         """
         Retorna a última viagem não finalizada, se existir.
+
+        Args:
+            veiculo_id: Restringe a um veículo (None = frota inteira)
         
         Returns:
             Dicionário com informações da viagem ou None se não houver viagem ativa
         """
+        filtro, parametros = self._filtro_veiculo(veiculo_id, 'AND')
         with self._get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             cursor.execute(
-                '''
+                f'''
                 SELECT * FROM viagens
-                WHERE hora_chegada IS NULL
-                ORDER BY data DESC, hora_saida DESC
+                WHERE hora_chegada IS NULL {filtro}
+                ORDER BY data_iso DESC, hora_saida DESC, id DESC
                 LIMIT 1
-                '''
+                ''',
+                parametros
             )
             row = cursor.fetchone()
             return dict(row) if row else None
 
-    def atualizar_viagem(self, viagem_id: int, **kwargs) -> bool:
+    def obter_ultimo_km(self, veiculo_id: Optional[int] = None) -> Optional[int]:
+        """
+        Retorna o KM final da viagem finalizada mais recente.
+
+        O valor fica em cache por veículo e é renovado pelas escritas desta
+        instância.
+
+        Args:
+            veiculo_id: Restringe a um veículo (None = frota inteira)
+
+        Returns:
+            Último KM final registrado ou None se nenhuma viagem foi finalizada
+        """
+        ultimo_km = self._ultimo_km.get(veiculo_id, _NAO_CARREGADO)
+        if ultimo_km is _NAO_CARREGADO:
+            with self._get_connection() as conn:
+                ultimo_km = self._consultar_ultimo_km(conn, veiculo_id)
+            self._ultimo_km = {**self._ultimo_km, veiculo_id: ultimo_km}
+        return ultimo_km
+
+    def _guardar_ultimo_km(self, veiculo_id: Optional[int], ultimo_km: Optional[int]):
+        """Atualiza o cache do odômetro após uma escrita no veículo (o valor da frota é descartado)."""
+        cache = {chave: valor for chave, valor in self._ultimo_km.items() if chave is not None}
+        cache[veiculo_id] = ultimo_km
+        self._ultimo_km = cache
+
+    @classmethod
+    def _consultar_ultimo_km(cls, conn: sqlite3.Connection, veiculo_id: Optional[int] = None) -> Optional[int]:
+        """Lê o último KM final percorrendo o índice de datas (do veículo) de trás para frente."""
+        filtro, parametros = cls._filtro_veiculo(veiculo_id, 'AND')
+        row = conn.execute(
+            f'''
+            SELECT km_final FROM viagens
+            WHERE km_final IS NOT NULL {filtro}
+            ORDER BY data_iso DESC, hora_saida DESC, id DESC
+            LIMIT 1
+            ''',
+            parametros
+        ).fetchone()
+        return row['km_final'] if row else None
+
+    def atualizar_viagem(self, viagem_id: int, *, somente_veiculo: Optional[int] = None, **kwargs) -> bool:
         """
         Atualiza informações de uma viagem.
         
         Args:
             viagem_id: ID da viagem a ser atualizada
-            kwargs: Campos a serem atualizados (data, hora_saida, km_inicial, etc.)
+            somente_veiculo: Se informado, só atualiza a viagem se ela for deste veículo
+            kwargs: Campos a serem atualizados (data, hora_saida, km_inicial,
+                veiculo_id etc.)
             
         Returns:
             True se a operação foi bem-sucedida
         """
-        if not kwargs:
+        tabela = self._tabela_da_viagem(viagem_id)
+        if not kwargs or tabela is None:
             return False
-            
+
+        if 'data' in kwargs:
+            kwargs['data'], kwargs['data_iso'] = self._normalizar_data(kwargs['data'])
+        for campo in ('hora_saida', 'hora_chegada'):
+            if kwargs.get(campo) is not None:
+                kwargs[campo] = self._normalizar_hora(kwargs[campo])
+
         set_clause = ', '.join(f"{key} = ?" for key in kwargs.keys())
+        filtro, parametros = self._filtro_veiculo(somente_veiculo, 'AND')
         values = list(kwargs.values())
         values.append(viagem_id)
+        values.extend(parametros)
         
         with self._get_connection() as conn:
+            # Trocar o veículo também muda o odômetro do veículo anterior
+            veiculos = set()
+            if 'veiculo_id' in kwargs:
+                self._verificar_veiculo(conn, kwargs['veiculo_id'])
+                veiculo_anterior = self._veiculo_da_viagem(conn, viagem_id)
+                if veiculo_anterior is None:
+                    return False
+                veiculos.add(veiculo_anterior)
+            resumos.somar(conn, tabela, f'id = ? {filtro}', (viagem_id, *parametros), -1)
             cursor = conn.cursor()
             cursor.execute(
                 f'''
-                UPDATE viagens
-                SET {set_clause}
-                WHERE id = ?
+                UPDATE {tabela}
+                SET {set_clause}, atualizado_em = CURRENT_TIMESTAMP
+                WHERE id = ? {filtro}
                 ''',
                 values
             )
+            if cursor.rowcount == 0:
+                return False
+            resumos.somar(conn, tabela, 'id = ?', (viagem_id,))
+            veiculos.add(self._veiculo_da_viagem(conn, viagem_id))
+            odometros = {veiculo: self._consultar_ultimo_km(conn, veiculo) for veiculo in veiculos}
             conn.commit()
-            return cursor.rowcount > 0
\ No newline at end of file
+            for veiculo, ultimo_km in odometros.items():
+                self._guardar_ultimo_km(veiculo, ultimo_km)
+            return True
+
+    def reconstruir_resumos(self) -> Dict[str, int]:
+        """
+        Recalcula as tabelas de resumo a partir de todas as viagens.
+
+        Returns:
+            Número de linhas de cada tabela de resumo
+        """
+        with self._get_connection() as conn:
+            return resumos.reconstruir(conn)
+
+    def obter_resumo(self, granularidade: str = 'mes', agrupar: Sequence[str] = ('periodo', 'destino'),
+                     veiculo_id: Optional[int] = None, inicio: Optional[str] = None,
+                     fim: Optional[str] = None) -> List[Dict]:
+        """
+        Retorna km, viagens e minutos agregados a partir das tabelas de resumo.
+
+        Args:
+            granularidade: 'dia' ou 'mes'
+            agrupar: Colunas do agrupamento ('veiculo_id', 'periodo', 'destino',
+                'dia_semana')
+            veiculo_id: Restringe a um veículo (None = frota inteira)
+            inicio: Primeiro período incluído (YYYY-MM-DD ou YYYY-MM)
+            fim: Último período incluído (YYYY-MM-DD ou YYYY-MM)
+
+        Returns:
+            Lista de dicionários com as colunas de ``agrupar`` mais viagens,
+            finalizadas, km e minutos
+        """
+        with self._get_connection() as conn:
+            return resumos.consultar(conn, granularidade, agrupar, veiculo_id, inicio, fim)
@@ -0,0 +1,525 @@
+"""
+Armazenamento das viagens dividido em arquivos SQLite por período.
+
+No modo fragmentado cada ano (ou mês) de viagens fica em um arquivo próprio
+ao lado do banco principal (``diario_bordo_2024.db``, ``diario_bordo_202405.db``).
+O banco principal guarda os veículos e as viagens anteriores à
+fragmentação. Cada conexão anexa os fragmentos com ATTACH e recebe uma view
+temporária ``viagens`` que une todos eles, então as consultas de
+DatabaseManager funcionam sem alteração. O SQLite combina os índices de
+cada fragmento (MERGE UNION ALL) em vez de ordenar o histórico inteiro.
+
+As escritas vão direto para a tabela do fragmento. O id de uma viagem
+indica o fragmento onde ela está: cada fragmento numera a partir de
+``código do período * FAIXA_IDS``. Uma viagem com a data editada permanece
+no fragmento em que foi criada. Fragmentos antigos podem ser anexados
+somente para leitura, compactados ou copiados individualmente, arquivados
+(retirados da consulta) ou consolidados de volta no banco principal.
+
+Cada conexão só pode anexar SQLITE_LIMIT_ATTACHED bancos (10 na compilação
+padrão do SQLite, sem como aumentar em tempo de execução). Com granularidade
+'mes' esse limite chega em poucos meses: ao atingi-lo, o período mais antigo
+é consolidado automaticamente no banco principal antes de criar o novo. Se
+o fragmento antigo estiver em uso por outra conexão, a escrita falha com uma
+mensagem clara e nada é criado.
+
+Um período consolidado que volta a receber viagens (ex.: importação de
+diários em papel) ganha um fragmento novo cuja numeração continua acima dos
+ids já copiados para o banco principal.
+"""
+
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.request import pathname2url
+
+from . import resumos
+from .database import DEFAULT_DB_PATH, DatabaseManager
+from .migracoes import VERSAO_ATUAL, ler_schema, versao_schema
+from .pragmas import PERFIL_PADRAO, aplicar_pragmas
+
+GRANULARIDADES = ('ano', 'mes')
+
+# Viagens do fragmento de código C têm id em [C * FAIXA_IDS, (C + 1) * FAIXA_IDS)
+FAIXA_IDS = 10 ** 10
+
+# Pragmas do perfil que também valem para cada fragmento anexado
+_PRAGMAS_FRAGMENTO = ('journal_mode', 'synchronous')
+
+
+def _limite_anexos() -> int:
+    """Maior número de bancos anexados que o SQLite em uso permite por conexão."""
+    conn = sqlite3.connect(':memory:')
+    try:
+        # O SQLite reduz o pedido ao teto da compilação (125 é o máximo absoluto)
+        conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 125)
+        return conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    finally:
+        conn.close()
+
+
+class _ConexaoFragmentada(sqlite3.Connection):
+    """Conexão que lembra qual versão do conjunto de fragmentos tem anexada."""
+
+    versao_fragmentos: Optional[int] = None
+
+
+class DatabaseManagerFragmentado(DatabaseManager):
+    """DatabaseManager que grava cada período de viagens em um arquivo SQLite separado."""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, pool_size: int = 5,
+                 perfil: Union[str, Dict] = PERFIL_PADRAO, granularidade: str = 'ano',
+                 periodos_gravaveis: Optional[int] = None):
+        """
+        Inicializa o gerenciador fragmentado.
+
+        Args:
+            db_path: Banco principal (veículos e viagens anteriores à fragmentação)
+            pool_size: Número máximo de conexões mantidas no pool
+            perfil: Perfil de pragmas, como em DatabaseManager
+            granularidade: 'ano' ou 'mes'
+            periodos_gravaveis: Se informado, só o período atual e os
+                ``periodos_gravaveis - 1`` anteriores são anexados para
+                escrita; os mais antigos ficam somente leitura
+        """
+        if granularidade not in GRANULARIDADES:
+            raise ValueError(f"Granularidade desconhecida: {granularidade}")
+
+        super().__init__(db_path, pool_size, perfil)
+        self.granularidade = granularidade
+        self.periodos_gravaveis = periodos_gravaveis
+        self._prefixo = os.path.splitext(db_path)[0]
+        self._fragmentos: Dict[int, str] = {}
+        # Maior id de cada período já consolidado no banco principal: ids até
+        # ele ficam em main.viagens mesmo que o período tenha fragmento de novo
+        self._consolidados: Dict[int, int] = {}
+        self._fragmentos_descobertos = False
+        self._versao_fragmentos = 0
+        self._lock_fragmentos = threading.RLock()
+        # Máximo de fragmentos em uso ao mesmo tempo (um ATTACH por fragmento)
+        self.max_fragmentos = _limite_anexos()
+
+    # Períodos e arquivos
+
+    def _codigo_periodo(self, data_iso: str) -> int:
+        """Código do período de uma data YYYY-MM-DD (2024 ou 202405)."""
+        if self.granularidade == 'ano':
+            return int(data_iso[:4])
+        return int(data_iso[:4] + data_iso[5:7])
+
+    @staticmethod
+    def _esquema(codigo: int) -> str:
+        """Nome do banco anexado para o fragmento."""
+        return f"f{codigo}"
+
+    def _normalizar_periodo(self, periodo: Union[int, str]) -> int:
+        """Aceita 2024, '2024', 202405 ou '2024-05' e retorna o código do período."""
+        codigo = int(str(periodo).replace('-', ''))
+        if codigo not in self._fragmentos:
+            raise ValueError(f"Fragmento inexistente: {periodo}")
+        return codigo
+
+    def _somente_leitura(self, codigo: int) -> bool:
+        """Indica se o fragmento é antigo demais para receber escritas."""
+        if self.periodos_gravaveis is None:
+            return False
+        hoje = date.today()
+        if self.granularidade == 'ano':
+            distancia = hoje.year - codigo
+        else:
+            distancia = (hoje.year * 12 + hoje.month) - ((codigo // 100) * 12 + codigo % 100)
+        return distancia >= self.periodos_gravaveis
+
+    def _descobrir_fragmentos(self):
+        """Registra os arquivos de fragmento já existentes no diretório do banco."""
+        diretorio = os.path.dirname(self._prefixo) or '.'
+        digitos = 4 if self.granularidade == 'ano' else 6
+        padrao = re.compile(rf'^{re.escape(os.path.basename(self._prefixo))}_(\d{{{digitos}}})\.db$')
+        for nome in os.listdir(diretorio):
+            encontrado = padrao.match(nome)
+            if encontrado:
+                self._fragmentos[int(encontrado.group(1))] = os.path.join(diretorio, nome)
+
+    def _carregar_consolidados(self):
+        """Lê do banco principal o maior id de cada período consolidado."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self._consolidados = dict(conn.execute(
+                'SELECT id / ?, MAX(id) FROM viagens WHERE id >= ? GROUP BY 1', (FAIXA_IDS, FAIXA_IDS)
+            ))
+        finally:
+            conn.close()
+
+    def _initialize_db(self):
+        """Migra o banco principal e registra os fragmentos existentes."""
+        with self._lock_fragmentos:
+            if self._fragmentos_descobertos:
+                return
+            versao = 0
+            if os.path.exists(self.db_path):
+                conn = sqlite3.connect(self.db_path)
+                try:
+                    versao = versao_schema(conn)
+                finally:
+                    conn.close()
+
+            super()._initialize_db()
+            self._descobrir_fragmentos()
+            self._carregar_consolidados()
+            self._fragmentos_descobertos = True
+            self._versao_fragmentos += 1
+
+            # A migração só enxerga o banco principal: índices novos dos
+            # fragmentos e os resumos são atualizados aqui
+            if versao < VERSAO_ATUAL and self._fragmentos:
+                for caminho in self._fragmentos.values():
+                    self._atualizar_fragmento(caminho)
+                with self._conexao_manutencao() as conn:
+                    self._preparar_conexao(conn)
+                    with conn:
+                        resumos.reconstruir(conn)
+
+    @staticmethod
+    def _ddl_fragmento() -> List[str]:
+        """
+        Comandos de schema.sql que criam a tabela viagens e seus índices.
+
+        A chave estrangeira para veiculos é removida: o SQLite não a aceita
+        entre arquivos diferentes (a verificação é feita em _verificar_veiculo).
+        """
+        comandos = []
+        for comando in ler_schema():
+            if re.search(r'CREATE TABLE IF NOT EXISTS viagens\b', comando) or re.search(r'\bON viagens\b', comando):
+                comandos.append(re.sub(r'\s+REFERENCES\s+\w+\s*\([^)]*\)', '', comando))
+        return comandos
+
+    def _criar_fragmento(self, caminho: str, codigo: int, ultimo_id: int):
+        """Cria o arquivo do fragmento com o schema de viagens; os ids começam após ``ultimo_id``."""
+        conn = sqlite3.connect(caminho)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for comando in self._ddl_fragmento():
+                conn.execute(comando)
+            conn.execute(
+                '''
+                INSERT INTO sqlite_sequence (name, seq)
+                SELECT 'viagens', ? WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'viagens')
+                ''',
+                (ultimo_id,)
+            )
+            conn.execute(f'PRAGMA user_version = {VERSAO_ATUAL}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _atualizar_fragmento(self, caminho: str):
+        """Aplica a um fragmento de versão anterior os índices atuais de schema.sql."""
+        conn = sqlite3.connect(caminho)
+        try:
+            if versao_schema(conn) >= VERSAO_ATUAL:
+                return
+            conn.execute('BEGIN IMMEDIATE')
+            for comando in self._ddl_fragmento():
+                conn.execute(comando)
+            conn.execute(f'PRAGMA user_version = {VERSAO_ATUAL}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    # Conexões
+
+    def _criar_conexao(self) -> sqlite3.Connection:
+        """Abre a conexão com nomes de arquivo em URI, necessários para anexar fragmentos somente leitura."""
+        conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(self.db_path))}",
+                               uri=True, check_same_thread=False, factory=_ConexaoFragmentada)
+        conn.row_factory = sqlite3.Row
+        conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, self.max_fragmentos)
+        aplicar_pragmas(conn, self.pragmas)
+        return conn
+
+    @contextmanager
+    def _conexao_avulsa(self, codigo: int, caminho: str):
+        """
+        Conexão fora do pool com o banco principal e apenas um fragmento anexado.
+
+        Usada na manutenção, que precisa funcionar mesmo com mais fragmentos
+        do que o limite de ATTACH. Confirma a transação ao final do bloco.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(f'ATTACH DATABASE ? AS {self._esquema(codigo)}', (caminho,))
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _erro_limite(self, detalhe: str) -> sqlite3.OperationalError:
+        """Erro para quando os fragmentos não cabem no limite de ATTACH do SQLite."""
+        return sqlite3.OperationalError(
+            f"{detalhe}: o SQLite anexa no máximo {self.max_fragmentos} fragmentos por conexão; "
+            "os períodos antigos são consolidados no banco principal quando não estão em uso"
+        )
+
+    def _preparar_conexao(self, conn: sqlite3.Connection):
+        """Anexa ou desanexa fragmentos se o conjunto mudou desde o último uso da conexão."""
+        if conn.versao_fragmentos != self._versao_fragmentos:
+            self._sincronizar_fragmentos(conn)
+
+    def _sincronizar_fragmentos(self, conn: sqlite3.Connection):
+        """Ajusta os bancos anexados à conexão e recria a view temporária viagens."""
+        with self._lock_fragmentos:
+            fragmentos = dict(self._fragmentos)
+            versao = self._versao_fragmentos
+
+        desejados = {self._esquema(codigo): codigo for codigo in fragmentos}
+        anexados = {row[1] for row in conn.execute('PRAGMA database_list')} - {'main', 'temp'}
+
+        if len(desejados) > self.max_fragmentos:
+            raise self._erro_limite(f"{len(desejados)} fragmentos em uso")
+
+        # query_only (perfil 'readonly-analytics') também bloqueia a view temporária
+        somente_consulta = conn.execute('PRAGMA query_only').fetchone()[0]
+        conn.execute('PRAGMA query_only = OFF')
+        try:
+            conn.execute('DROP VIEW IF EXISTS temp.viagens')
+            for esquema in anexados - set(desejados):
+                conn.execute(f'DETACH DATABASE {esquema}')
+            for esquema, codigo in desejados.items():
+                if esquema not in anexados:
+                    self._anexar(conn, esquema, fragmentos[codigo], codigo)
+
+            # Colunas explícitas: bancos migrados têm as colunas em outra ordem que os fragmentos
+            colunas = ', '.join(row[1] for row in conn.execute('PRAGMA main.table_xinfo(viagens)'))
+            partes = [f'SELECT {colunas} FROM main.viagens']
+            partes += [f'SELECT {colunas} FROM {esquema}.viagens' for esquema in sorted(desejados, reverse=True)]
+            conn.execute(f"CREATE TEMP VIEW viagens AS {' UNION ALL '.join(partes)}")
+        finally:
+            conn.execute(f'PRAGMA query_only = {somente_consulta}')
+        conn.versao_fragmentos = versao
+
+    def _anexar(self, conn: sqlite3.Connection, esquema: str, caminho: str, codigo: int):
+        """Anexa um fragmento, somente leitura se for antigo."""
+        somente_leitura = self._somente_leitura(codigo)
+        uri = f"file:{pathname2url(os.path.abspath(caminho))}"
+        if somente_leitura:
+            uri += '?mode=ro'
+        conn.execute(f'ATTACH DATABASE ? AS {esquema}', (uri,))
+        if not somente_leitura:
+            for nome in _PRAGMAS_FRAGMENTO:
+                if nome in self.pragmas:
+                    conn.execute(f'PRAGMA {esquema}.{nome} = {self.pragmas[nome]}')
+
+    def _garantir_fragmento(self, conn: sqlite3.Connection, codigo: int, manter: Iterable[int] = ()):
+        """
+        Cria o fragmento do período se necessário e o deixa anexado à conexão.
+
+        ``manter`` são os outros períodos da mesma escrita, que não podem ser
+        consolidados para abrir espaço.
+        """
+        with self._lock_fragmentos:
+            if codigo not in self._fragmentos:
+                # Verificado antes de criar o arquivo: um fragmento a mais
+                # impediria todas as leituras
+                if len(self._fragmentos) >= self.max_fragmentos:
+                    self._liberar_anexo(conn, codigo, manter)
+                # Viagens de uma consolidação anterior do período já ocupam o
+                # começo da faixa no banco principal
+                ultimo_id = conn.execute(
+                    'SELECT MAX(id) FROM main.viagens WHERE id >= ? AND id < ?',
+                    (codigo * FAIXA_IDS, (codigo + 1) * FAIXA_IDS)
+                ).fetchone()[0]
+                caminho = f"{self._prefixo}_{codigo}.db"
+                self._criar_fragmento(caminho, codigo, ultimo_id or codigo * FAIXA_IDS)
+                self._fragmentos[codigo] = caminho
+                self._versao_fragmentos += 1
+        self._preparar_conexao(conn)
+
+    def _liberar_anexo(self, conn: sqlite3.Connection, codigo: int, manter: Iterable[int]):
+        """Consolida o período mais antigo no banco principal para abrir espaço para ``codigo``."""
+        antigo = min(set(self._fragmentos) - set(manter))
+        # consolidar_fragmento exige que nenhuma conexão tenha o arquivo
+        # aberto, inclusive esta (a próxima sincronização anexa de novo)
+        conn.execute('DROP VIEW IF EXISTS temp.viagens')
+        for esquema in {row[1] for row in conn.execute('PRAGMA database_list')} - {'main', 'temp'}:
+            conn.execute(f'DETACH DATABASE {esquema}')
+        conn.versao_fragmentos = None
+        try:
+            self.consolidar_fragmento(antigo)
+        except sqlite3.OperationalError as e:
+            raise self._erro_limite(
+                f"Não é possível criar o período {codigo} (consolidação de {antigo} falhou: {e})"
+            ) from e
+
+    # Roteamento das escritas
+
+    def _tabela_escrita(self, conn: sqlite3.Connection, data_iso: str) -> str:
+        codigo = self._codigo_periodo(data_iso)
+        self._garantir_fragmento(conn, codigo)
+        return f"{self._esquema(codigo)}.viagens"
+
+    def _grupos_escrita(self, conn: sqlite3.Connection,
+                        linhas: Iterable[Tuple]) -> Iterator[Tuple[str, Iterable[Tuple]]]:
+        # Todos os fragmentos precisam estar anexados antes do primeiro INSERT
+        # (ATTACH não é permitido dentro de uma transação)
+        grupos: Dict[int, List[Tuple]] = {}
+        for linha in linhas:
+            grupos.setdefault(self._codigo_periodo(linha[1]), []).append(linha)
+        if len(grupos) > self.max_fragmentos:
+            raise self._erro_limite(f"O lote abrange {len(grupos)} períodos; divida a importação")
+        for codigo in grupos:
+            self._garantir_fragmento(conn, codigo, grupos)
+        for codigo, grupo in sorted(grupos.items()):
+            yield f"{self._esquema(codigo)}.viagens", grupo
+
+    def _tabela_da_viagem(self, viagem_id: int) -> Optional[str]:
+        codigo = viagem_id // FAIXA_IDS
+        if codigo == 0:
+            return 'main.viagens'
+        if not self._fragmentos_descobertos:
+            self._initialize_db()
+        if codigo not in self._fragmentos or viagem_id <= self._consolidados.get(codigo, 0):
+            # Período consolidado: a viagem foi copiada para o banco principal
+            # (se o período foi arquivado, o UPDATE simplesmente não a encontra)
+            return 'main.viagens'
+        return f"{self._esquema(codigo)}.viagens"
+
+    def _verificar_veiculo(self, conn: sqlite3.Connection, veiculo_id: int):
+        if conn.execute('SELECT 1 FROM main.veiculos WHERE id = ?', (veiculo_id,)).fetchone() is None:
+            raise sqlite3.IntegrityError('FOREIGN KEY constraint failed')
+
+    # Manutenção
+
+    def listar_fragmentos(self) -> List[Dict]:
+        """Retorna os fragmentos em uso, do mais recente ao mais antigo."""
+        self._initialize_db()
+        with self._lock_fragmentos:
+            fragmentos = sorted(self._fragmentos.items(), reverse=True)
+        return [
+            {
+                'periodo': codigo,
+                'caminho': caminho,
+                'somente_leitura': self._somente_leitura(codigo),
+                'tamanho_bytes': os.path.getsize(caminho),
+            }
+            for codigo, caminho in fragmentos
+        ]
+
+    def vacuum_fragmento(self, periodo: Union[int, str]):
+        """Executa VACUUM apenas no arquivo do período."""
+        self._initialize_db()
+        # Conexão própria: o VACUUM de um banco anexado ocupa mais um slot de
+        # ATTACH e recriaria os índices pelo nome encoberto pela view temporária
+        conn = sqlite3.connect(self._fragmentos[self._normalizar_periodo(periodo)])
+        try:
+            conn.execute('VACUUM')
+        finally:
+            conn.close()
+
+    def backup_fragmento(self, periodo: Union[int, str], destino: str):
+        """Copia apenas o arquivo do período com a API de backup do SQLite."""
+        with self._get_connection() as conn:
+            esquema = self._esquema(self._normalizar_periodo(periodo))
+            copia = sqlite3.connect(destino)
+            try:
+                conn.backup(copia, name=esquema)
+            finally:
+                copia.close()
+
+    def arquivar_fragmento(self, periodo: Union[int, str], diretorio: str) -> str:
+        """
+        Retira o fragmento das consultas e dos resumos e move o arquivo
+        para ``diretorio``.
+
+        Falha (sem alterar nada) se o arquivo ainda estiver em uso por uma
+        conexão emprestada.
+
+        Returns:
+            Caminho do arquivo arquivado
+        """
+        self._initialize_db()
+        codigo = self._normalizar_periodo(periodo)
+        tabela = f"{self._esquema(codigo)}.viagens"
+        caminho = self._fragmentos[codigo]
+        with self._conexao_avulsa(codigo, caminho) as conn:
+            resumos.somar(conn, tabela, '1', (), -1)
+        with self._lock_fragmentos:
+            self._fragmentos.pop(codigo)
+            self._versao_fragmentos += 1
+
+        try:
+            self._pool.descartar_ociosas()
+            # Sai do modo WAL para que o arquivo movido fique autocontido
+            conn = sqlite3.connect(caminho, timeout=0)
+            try:
+                conn.execute('PRAGMA journal_mode = DELETE')
+            finally:
+                conn.close()
+            os.makedirs(diretorio, exist_ok=True)
+            destino = shutil.move(caminho, os.path.join(diretorio, os.path.basename(caminho)))
+        except Exception:
+            with self._lock_fragmentos:
+                self._fragmentos[codigo] = caminho
+                self._versao_fragmentos += 1
+            with self._conexao_avulsa(codigo, caminho) as conn:
+                resumos.somar(conn, tabela, '1')
+            raise
+        return destino
+
+    def consolidar_fragmento(self, periodo: Union[int, str]) -> int:
+        """
+        Copia as viagens do fragmento para o banco principal e apaga o arquivo.
+
+        Libera um ATTACH sem tirar as viagens das consultas nem dos resumos;
+        os ids são mantidos. Falha (sem alterar nada) se o arquivo ainda
+        estiver em uso por uma conexão emprestada.
+
+        Returns:
+            Número de viagens copiadas
+        """
+        self._initialize_db()
+        codigo = self._normalizar_periodo(periodo)
+        with self._lock_fragmentos:
+            caminho = self._fragmentos.pop(codigo)
+            self._versao_fragmentos += 1
+
+        try:
+            self._pool.descartar_ociosas()
+            # Garante que nenhuma outra conexão está com o fragmento aberto
+            conn = sqlite3.connect(caminho, timeout=0)
+            try:
+                conn.execute('PRAGMA journal_mode = DELETE')
+            finally:
+                conn.close()
+
+            with self._conexao_avulsa(codigo, caminho) as conn:
+                esquema = self._esquema(codigo)
+                # Só as colunas armazenadas (hidden = 0); as geradas são recalculadas
+                colunas = ', '.join(
+                    row[1] for row in conn.execute(f'PRAGMA {esquema}.table_xinfo(viagens)') if row[6] == 0
+                )
+                copiadas = conn.execute(
+                    f'INSERT INTO main.viagens ({colunas}) SELECT {colunas} FROM {esquema}.viagens'
+                ).rowcount
+                maior_id = conn.execute(f'SELECT MAX(id) FROM {esquema}.viagens').fetchone()[0]
+        except Exception:
+            with self._lock_fragmentos:
+                self._fragmentos[codigo] = caminho
+                self._versao_fragmentos += 1
+            raise
+
+        if maior_id is not None:
+            with self._lock_fragmentos:
+                self._consolidados[codigo] = max(maior_id, self._consolidados.get(codigo, 0))
+        os.remove(caminho)
+        return copiadas
@@ -0,0 +1,211 @@
+"""
+Migrações versionadas do banco do Diário de Bordo.
+
+A versão do schema fica em ``PRAGMA user_version``. O schema completo vive
+apenas em ``schema.sql``; as migrações abaixo só levam bancos antigos até
+ele (colunas novas, dados a converter, objetos removidos).
+"""
+
+import os
+import sqlite3
+from typing import Callable, List, Tuple
+
+from utils.data_utils import FORMATO_DATA, FORMATO_HORA, DataUtils
+
+from . import resumos
+
+CAMINHO_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+
+def _adicionar_data_iso(conn: sqlite3.Connection):
+    """Adiciona a coluna data_iso (YYYY-MM-DD), preenchida por _canonizar_datas."""
+    colunas = {row[1] for row in conn.execute('PRAGMA table_info(viagens)')}
+    if 'data_iso' not in colunas:
+        conn.execute('ALTER TABLE viagens ADD COLUMN data_iso TEXT')
+
+
+def _remover_gatilho_timestamp(conn: sqlite3.Connection):
+    """Remove o gatilho que fazia um segundo UPDATE para gravar atualizado_em."""
+    conn.execute('DROP TRIGGER IF EXISTS atualiza_timestamp')
+
+
+def _adicionar_colunas_geradas(conn: sqlite3.Connection):
+    """Adiciona km_percorrido, duracao_min e duracao como colunas geradas."""
+    colunas = {row[1] for row in conn.execute('PRAGMA table_xinfo(viagens)')}
+    definicoes = [
+        ('km_percorrido', '''INTEGER GENERATED ALWAYS AS (
+            CASE WHEN km_final IS NULL THEN 0 ELSE km_final - km_inicial END
+        ) VIRTUAL'''),
+        ('duracao_min', '''INTEGER GENERATED ALWAYS AS (
+            ((CAST(strftime('%s', '2000-01-01 ' || hora_chegada) AS INTEGER)
+              - CAST(strftime('%s', '2000-01-01 ' || hora_saida) AS INTEGER)) / 60 % 1440 + 1440) % 1440
+        ) VIRTUAL'''),
+        ('duracao', '''TEXT GENERATED ALWAYS AS (
+            CASE WHEN duracao_min IS NULL THEN 'N/A'
+                 ELSE printf('%02d:%02d', duracao_min / 60, duracao_min % 60) END
+        ) VIRTUAL'''),
+    ]
+    for nome, definicao in definicoes:
+        if nome not in colunas:
+            conn.execute(f'ALTER TABLE viagens ADD COLUMN {nome} {definicao}')
+
+
+def _adicionar_veiculo_id(conn: sqlite3.Connection):
+    """Associa as viagens existentes ao veículo padrão (id 1)."""
+    colunas = {row[1] for row in conn.execute('PRAGMA table_xinfo(viagens)')}
+    if 'veiculo_id' not in colunas:
+        conn.execute(
+            'ALTER TABLE viagens ADD COLUMN veiculo_id INTEGER NOT NULL DEFAULT 1 REFERENCES veiculos (id)'
+        )
+
+
+def _criar_resumos(conn: sqlite3.Connection):
+    """Cria as tabelas de resumo (schema.sql) e as preenche com o histórico existente."""
+    for comando in ler_schema():
+        if any(f'TABLE IF NOT EXISTS {resumo} ' in comando for resumo, _ in resumos.RESUMOS.values()):
+            conn.execute(comando)
+    resumos.reconstruir(conn)
+
+
+def _canonizar_datas(conn: sqlite3.Connection):
+    """
+    Reescreve data e horários na forma canônica e recalcula data_iso.
+
+    A tela de edição antiga gravava texto livre (ex.: 1/3/2024, 8:05), que o
+    preenchimento por substr da versão 1 transformava em chaves inválidas.
+    Viagens com data ou horário ilegível são listadas e ficam com data_iso
+    nula (fora dos resumos) até serem corrigidas na edição.
+    """
+    alteradas, ilegiveis = [], []
+    # Só as linhas que não estão na forma canônica passam pelo Python
+    # (date() normaliza datas como 31/02, que então não batem com data_iso)
+    suspeitas = conn.execute(
+        '''
+        SELECT id, data, data_iso, hora_saida, hora_chegada FROM viagens
+        WHERE data_iso IS NULL
+           OR data NOT GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]'
+           OR data_iso IS NOT substr(data, 7, 4) || '-' || substr(data, 4, 2) || '-' || substr(data, 1, 2)
+           OR date(data_iso) IS NOT data_iso
+           OR hora_saida NOT GLOB '[0-2][0-9]:[0-5][0-9]' OR hora_saida >= '24'
+           OR hora_chegada NOT GLOB '[0-2][0-9]:[0-5][0-9]' OR hora_chegada >= '24'
+        '''
+    ).fetchall()
+    for viagem_id, data, data_iso, hora_saida, hora_chegada in suspeitas:
+        dia = DataUtils.converter_data(str(data).strip())
+        horas = [DataUtils.converter_hora(str(hora).strip()) if hora is not None else None
+                 for hora in (hora_saida, hora_chegada)]
+        if dia is None or horas[0] is None or (hora_chegada is not None and horas[1] is None):
+            ilegiveis.append(viagem_id)
+
+        novos = (
+            dia.strftime(FORMATO_DATA) if dia else data,
+            dia.isoformat() if dia else None,
+            horas[0].strftime(FORMATO_HORA) if horas[0] else hora_saida,
+            horas[1].strftime(FORMATO_HORA) if horas[1] else hora_chegada,
+        )
+        if novos != (data, data_iso, hora_saida, hora_chegada):
+            alteradas.append((*novos, viagem_id))
+
+    conn.executemany(
+        'UPDATE viagens SET data = ?, data_iso = ?, hora_saida = ?, hora_chegada = ? WHERE id = ?',
+        alteradas
+    )
+    if alteradas:
+        # Os resumos (versão 5) foram somados com as chaves antigas
+        resumos.reconstruir(conn)
+    if ilegiveis:
+        print(f"Aviso: {len(ilegiveis)} viagens com data ou horário ilegível; corrija-as em "
+              f"Editar Viagem (ids: {', '.join(map(str, ilegiveis[:20]))}"
+              f"{', ...' if len(ilegiveis) > 20 else ''}). Sem data válida, a viagem fica fora "
+              f"da ordenação e dos resumos")
+
+
+def _restaurar_indice_ativa(conn: sqlite3.Connection):
+    """Recria idx_viagens_ativa, removido na versão 4, para a viagem ativa da frota inteira."""
+    for comando in ler_schema():
+        if 'INDEX IF NOT EXISTS idx_viagens_ativa' in comando:
+            conn.execute(comando)
+
+
+# Passos em ordem; o número é a versão que o banco passa a ter após o passo
+MIGRACOES: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _adicionar_data_iso),
+    (2, _remover_gatilho_timestamp),
+    (3, _adicionar_colunas_geradas),
+    (4, _adicionar_veiculo_id),
+    (5, _criar_resumos),
+    (6, _restaurar_indice_ativa),
+    (7, _canonizar_datas),
+]
+
+VERSAO_ATUAL = MIGRACOES[-1][0]
+
+
+def ler_schema() -> List[str]:
+    """Lê schema.sql e o separa em comandos individuais."""
+    with open(CAMINHO_SCHEMA, 'r', encoding='utf-8') as f:
+        linhas = f.read().splitlines(keepends=True)
+
+    comandos, atual = [], ''
+    for linha in linhas:
+        atual += linha
+        if sqlite3.complete_statement(atual):
+            comandos.append(atual.strip())
+            atual = ''
+    return comandos
+
+
+def versao_schema(conn: sqlite3.Connection) -> int:
+    """Retorna a versão do schema gravada no banco."""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrar(conn: sqlite3.Connection) -> int:
+    """
+    Leva o banco até VERSAO_ATUAL em uma única transação.
+
+    Quando o banco já está atualizado custa apenas a leitura de um pragma.
+
+    Args:
+        conn: Conexão sem transação em aberto
+
+    Returns:
+        Versão do schema após a migração
+    """
+    if versao_schema(conn) == VERSAO_ATUAL:
+        return VERSAO_ATUAL
+
+    # ALTER TABLE com REFERENCES e DEFAULT não nulo exige chaves estrangeiras
+    # desligadas; o pragma não tem efeito dentro de uma transação
+    chaves_estrangeiras = conn.execute('PRAGMA foreign_keys').fetchone()[0]
+    conn.execute('PRAGMA foreign_keys = OFF')
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Outro processo pode ter migrado enquanto esperávamos o lock
+        versao = versao_schema(conn)
+        if versao > VERSAO_ATUAL:
+            raise RuntimeError(
+                f"Banco na versão {versao}, mais nova que a suportada ({VERSAO_ATUAL})"
+            )
+
+        if versao < VERSAO_ATUAL:
+            tabela_existe = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'viagens'"
+            ).fetchone()
+            if tabela_existe:
+                for numero, passo in MIGRACOES:
+                    if numero > versao:
+                        passo(conn)
+
+            for comando in ler_schema():
+                conn.execute(comando)
+            conn.execute(f'PRAGMA user_version = {VERSAO_ATUAL}')
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute(f'PRAGMA foreign_keys = {chaves_estrangeiras}')
+
+    return VERSAO_ATUAL
@@ -0,0 +1,133 @@
+"""
+Pool de conexões SQLite reutilizáveis para o DatabaseManager.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from queue import Empty, LifoQueue
+from typing import Callable, Dict, Iterator
+
+
+class ConnectionPool:
+    """Pool limitado de conexões SQLite reaproveitadas entre chamadas."""
+
+    def __init__(self, fabrica: Callable[[], sqlite3.Connection],
+                 tamanho_maximo: int = 5, timeout: float = 30.0):
+        """
+        Inicializa o pool de conexões.
+
+        Args:
+            fabrica: Função que abre e configura uma nova conexão
+            tamanho_maximo: Número máximo de conexões abertas simultaneamente
+            timeout: Tempo máximo (segundos) aguardando uma conexão livre
+        """
+        if tamanho_maximo < 1:
+            raise ValueError("O pool precisa de pelo menos uma conexão")
+
+        self._fabrica = fabrica
+        self._tamanho_maximo = tamanho_maximo
+        self._timeout = timeout
+        self._ociosas: LifoQueue = LifoQueue()
+        self._lock = threading.Lock()
+        self._fechado = False
+        self._abertas = 0
+        self._hits = 0
+        self._misses = 0
+        self._esperas = 0
+
+    def adquirir(self) -> sqlite3.Connection:
+        """Retorna uma conexão ociosa ou abre uma nova se houver espaço no pool."""
+        if self._fechado:
+            raise sqlite3.ProgrammingError("Pool de conexões fechado")
+
+        try:
+            conn = self._ociosas.get_nowait()
+            with self._lock:
+                self._hits += 1
+            return conn
+        except Empty:
+            pass
+
+        with self._lock:
+            criar = self._abertas < self._tamanho_maximo
+            if criar:
+                self._abertas += 1
+                self._misses += 1
+            else:
+                self._esperas += 1
+
+        if criar:
+            try:
+                return self._fabrica()
+            except Exception:
+                with self._lock:
+                    self._abertas -= 1
+                raise
+
+        try:
+            return self._ociosas.get(timeout=self._timeout)
+        except Empty:
+            raise sqlite3.OperationalError("Tempo esgotado aguardando conexão livre no pool")
+
+    def devolver(self, conn: sqlite3.Connection):
+        """Devolve uma conexão ao pool, descartando transações pendentes."""
+        if self._fechado:
+            conn.close()
+            with self._lock:
+                self._abertas -= 1
+            return
+
+        if conn.in_transaction:
+            conn.rollback()
+        self._ociosas.put(conn)
+
+    @contextmanager
+    def conexao(self) -> Iterator[sqlite3.Connection]:
+        """Empresta uma conexão do pool durante o bloco ``with``."""
+        conn = self.adquirir()
+        try:
+            yield conn
+        finally:
+            self.devolver(conn)
+
+    def estatisticas(self) -> Dict[str, int]:
+        """
+        Retorna os contadores de uso do pool.
+
+        Returns:
+            Dicionário com hits (reaproveitamentos), misses (conexões abertas),
+            waits (esperas por conexão livre), open e idle (conexões atuais)
+        """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'waits': self._esperas,
+                'open': self._abertas,
+                'idle': self._ociosas.qsize(),
+                'max_size': self._tamanho_maximo,
+            }
+
+    def descartar_ociosas(self):
+        """Fecha as conexões ociosas sem fechar o pool (novas serão abertas sob demanda)."""
+        while True:
+            try:
+                conn = self._ociosas.get_nowait()
+            except Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._abertas -= 1
+
+    def close(self):
+        """Fecha todas as conexões ociosas; as emprestadas são fechadas ao voltar."""
+        self._fechado = True
+        while True:
+            try:
+                conn = self._ociosas.get_nowait()
+            except Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._abertas -= 1
@@ -0,0 +1,96 @@
+"""
+Perfis de desempenho do SQLite aplicados a cada conexão do DatabaseManager.
+"""
+
+import sqlite3
+from typing import Dict, Union
+
+# Ordem importa: journal_mode precisa vir antes de query_only
+PRAGMAS_SUPORTADOS = (
+    'journal_mode',
+    'synchronous',
+    'busy_timeout',
+    'cache_size',
+    'mmap_size',
+    'temp_store',
+    'foreign_keys',
+    'query_only',
+)
+
+PERFIS: Dict[str, Dict[str, Union[int, str]]] = {
+    # WAL com fsync a cada commit: leitores não bloqueiam escritores e nada se perde
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+        'cache_size': -16000,      # ~16 MB
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'foreign_keys': 'ON',
+    },
+    # WAL com synchronous=NORMAL: um crash pode perder os últimos commits, nunca corromper
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -64000,      # ~64 MB
+        'mmap_size': 268435456,    # 256 MB
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    },
+    # Conexões somente leitura para relatórios e exportações
+    'readonly-analytics': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 10000,
+        'cache_size': -128000,     # ~128 MB
+        'mmap_size': 1073741824,   # 1 GB
+        'temp_store': 'MEMORY',
+        'query_only': 'ON',
+    },
+}
+
+PERFIL_PADRAO = 'durable'
+
+
+def resolver_perfil(perfil: Union[str, Dict[str, Union[int, str]]]) -> Dict[str, Union[int, str]]:
+    """
+    Retorna os pragmas de um perfil nomeado ou valida um perfil personalizado.
+
+    Args:
+        perfil: Nome de um perfil em PERFIS ou dicionário pragma -> valor
+
+    Returns:
+        Dicionário de pragmas na ordem em que devem ser aplicados
+    """
+    if isinstance(perfil, str):
+        if perfil not in PERFIS:
+            raise ValueError(f"Perfil de pragmas desconhecido: {perfil}")
+        pragmas = PERFIS[perfil]
+    else:
+        pragmas = dict(perfil)
+
+    desconhecidos = set(pragmas) - set(PRAGMAS_SUPORTADOS)
+    if desconhecidos:
+        raise ValueError(f"Pragmas não suportados: {', '.join(sorted(desconhecidos))}")
+
+    for nome, valor in pragmas.items():
+        if not isinstance(valor, int) and not str(valor).isalnum():
+            raise ValueError(f"Valor inválido para o pragma {nome}: {valor}")
+
+    return {nome: pragmas[nome] for nome in PRAGMAS_SUPORTADOS if nome in pragmas}
+
+
+def aplicar_pragmas(conn: sqlite3.Connection, pragmas: Dict[str, Union[int, str]]):
+    """Aplica os pragmas (já validados por resolver_perfil) em uma conexão."""
+    for nome, valor in pragmas.items():
+        conn.execute(f"PRAGMA {nome} = {valor}")
+
+
+def ler_pragmas(conn: sqlite3.Connection, nomes=PRAGMAS_SUPORTADOS) -> Dict[str, Union[int, str]]:
+    """Lê os valores efetivos dos pragmas informados em uma conexão."""
+    efetivos = {}
+    for nome in nomes:
+        linha = conn.execute(f"PRAGMA {nome}").fetchone()
+        efetivos[nome] = linha[0] if linha else None
+    return efetivos
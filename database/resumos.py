@@ -0,0 +1,151 @@
+"""
+Tabelas de resumo das viagens: viagens, km e minutos ao volante por
+veículo, destino e dia (resumo_diario) ou mês (resumo_mensal).
+
+As escritas do DatabaseManager mantêm os resumos na mesma transação: a
+contribuição antiga de uma viagem é subtraída antes do UPDATE e a nova
+somada depois. Relatórios leem algumas centenas de linhas de resumo em vez
+de percorrer o histórico inteiro. Viagens sem data_iso (data ilegível de
+bancos antigos, ver migracoes._canonizar_datas) ficam de fora.
+
+Reconstrução: python -m database reconstruir-resumos [caminho_do_banco]
+"""
+
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Granularidade -> (tabela de resumo, expressão do período a partir de data_iso)
+RESUMOS = {
+    'dia': ('resumo_diario', 'data_iso'),
+    'mes': ('resumo_mensal', 'substr(data_iso, 1, 7)'),
+}
+
+# Colunas pelas quais obter_resumo pode agrupar -> expressão SQL
+# (dia_semana: 0 = domingo, só no resumo diário)
+AGRUPAMENTOS = {
+    'veiculo_id': 'veiculo_id',
+    'periodo': 'periodo',
+    'destino': 'destino',
+    'dia_semana': "CAST(strftime('%w', periodo) AS INTEGER)",
+}
+
+
+def somar(conn: sqlite3.Connection, tabela: str, condicao: str,
+          parametros: Iterable = (), sinal: int = 1):
+    """
+    Soma (ou subtrai, com sinal -1) as viagens selecionadas aos resumos.
+
+    Args:
+        conn: Conexão com a transação da escrita em andamento
+        tabela: Tabela de viagens lida (ex.: 'viagens' ou um fragmento)
+        condicao: Filtro SQL das viagens cuja contribuição é aplicada
+        parametros: Parâmetros de ``condicao``
+        sinal: 1 para somar, -1 para subtrair
+    """
+    parametros = tuple(parametros)
+    for resumo, periodo in RESUMOS.values():
+        conn.execute(
+            f'''
+            INSERT INTO main.{resumo} (veiculo_id, periodo, destino, viagens, finalizadas, km, minutos)
+            SELECT veiculo_id, {periodo}, destino, ? * COUNT(*), ? * COUNT(hora_chegada),
+                   ? * SUM(km_percorrido), ? * COALESCE(SUM(duracao_min), 0)
+            FROM {tabela}
+            WHERE data_iso IS NOT NULL AND ({condicao})
+            GROUP BY veiculo_id, {periodo}, destino
+            ON CONFLICT (veiculo_id, periodo, destino) DO UPDATE SET
+                viagens = viagens + excluded.viagens,
+                finalizadas = finalizadas + excluded.finalizadas,
+                km = km + excluded.km,
+                minutos = minutos + excluded.minutos
+            ''',
+            (sinal,) * 4 + parametros
+        )
+        if sinal < 0:
+            # Remove os grupos que ficaram sem viagens. Um IN por coluna usa a
+            # chave primária inteira (o IN de tuplas só usaria veiculo_id); as
+            # combinações a mais são inofensivas, pois só linhas zeradas saem
+            conn.execute(
+                f'''
+                DELETE FROM main.{resumo}
+                WHERE veiculo_id IN (SELECT veiculo_id FROM {tabela} WHERE {condicao})
+                  AND periodo IN (SELECT {periodo} FROM {tabela} WHERE {condicao})
+                  AND destino IN (SELECT destino FROM {tabela} WHERE {condicao})
+                  AND viagens = 0
+                ''',
+                parametros * 3
+            )
+
+
+def reconstruir(conn: sqlite3.Connection) -> Dict[str, int]:
+    """
+    Recalcula os resumos a partir de todas as viagens.
+
+    Returns:
+        Número de linhas de cada tabela de resumo
+    """
+    for resumo, _ in RESUMOS.values():
+        conn.execute(f'DELETE FROM main.{resumo}')
+    somar(conn, 'viagens', '1')
+    return {
+        resumo: conn.execute(f'SELECT COUNT(*) FROM main.{resumo}').fetchone()[0]
+        for resumo, _ in RESUMOS.values()
+    }
+
+
+def consultar(conn: sqlite3.Connection, granularidade: str = 'mes',
+              agrupar: Sequence[str] = ('periodo', 'destino'),
+              veiculo_id: Optional[int] = None, inicio: Optional[str] = None,
+              fim: Optional[str] = None) -> List[Dict]:
+    """
+    Lê os resumos agregados pelas colunas pedidas.
+
+    Args:
+        conn: Conexão com o banco
+        granularidade: 'dia' ou 'mes'
+        agrupar: Subconjunto de AGRUPAMENTOS (vazio = total geral)
+        veiculo_id: Restringe a um veículo (None = frota inteira)
+        inicio: Primeiro período incluído (YYYY-MM-DD ou YYYY-MM)
+        fim: Último período incluído (YYYY-MM-DD ou YYYY-MM)
+
+    Returns:
+        Dicionários com as colunas de ``agrupar`` mais viagens, finalizadas,
+        km e minutos, ordenados pelas colunas de ``agrupar``
+    """
+    if granularidade not in RESUMOS:
+        raise ValueError(f"Granularidade desconhecida: {granularidade}")
+    desconhecidas = set(agrupar) - set(AGRUPAMENTOS)
+    if desconhecidas:
+        raise ValueError(f"Agrupamento desconhecido: {', '.join(sorted(desconhecidas))}")
+    if 'dia_semana' in agrupar and granularidade != 'dia':
+        raise ValueError("O agrupamento por dia_semana exige granularidade 'dia'")
+
+    resumo = RESUMOS[granularidade][0]
+    # Períodos mensais têm 7 caracteres: '2024-05-01' vira '2024-05'
+    tamanho = 10 if granularidade == 'dia' else 7
+    filtros, parametros = [], []
+    if veiculo_id is not None:
+        filtros.append('veiculo_id = ?')
+        parametros.append(veiculo_id)
+    if inicio:
+        filtros.append('periodo >= ?')
+        parametros.append(inicio[:tamanho])
+    if fim:
+        filtros.append('periodo <= ?')
+        parametros.append(fim[:tamanho])
+
+    colunas = [coluna for coluna in AGRUPAMENTOS if coluna in agrupar]
+    where = f"WHERE {' AND '.join(filtros)}" if filtros else ''
+    grupo = f"GROUP BY {', '.join(colunas)} ORDER BY {', '.join(colunas)}" if colunas else ''
+    selecao = ''.join(f'{AGRUPAMENTOS[coluna]} AS {coluna}, ' for coluna in colunas)
+    cursor = conn.execute(
+        f'''
+        SELECT {selecao}COALESCE(SUM(viagens), 0) AS viagens,
+               COALESCE(SUM(finalizadas), 0) AS finalizadas,
+               COALESCE(SUM(km), 0) AS km, COALESCE(SUM(minutos), 0) AS minutos
+        FROM {resumo} {where} {grupo}
+        ''',
+        parametros
+    )
+    nomes = [descricao[0] for descricao in cursor.description]
+    return [dict(zip(nomes, row)) for row in cursor]
+
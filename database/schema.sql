@@ -1,20 +1,76 @@
+-- Veículos da frota
+CREATE TABLE IF NOT EXISTS veiculos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    placa TEXT NOT NULL UNIQUE,
+    descricao TEXT,
+    criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Veículo padrão: dono das viagens de bancos anteriores à frota
+INSERT OR IGNORE INTO veiculos (id, placa, descricao) VALUES (1, 'PADRAO', 'Veículo padrão');
+
 -- Tabela para armazenar as viagens
 CREATE TABLE IF NOT EXISTS viagens (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
+    veiculo_id INTEGER NOT NULL DEFAULT 1 REFERENCES veiculos (id),
     data TEXT NOT NULL,                -- Formato DD/MM/YYYY
+    data_iso TEXT,                     -- Formato YYYY-MM-DD (chave de ordenação)
     hora_saida TEXT NOT NULL,          -- Formato HH:MM
     km_inicial INTEGER NOT NULL,
     destino TEXT NOT NULL,
     hora_chegada TEXT,                 -- Formato HH:MM (pode ser NULL)
     km_final INTEGER,                  -- Pode ser NULL
     criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Colunas geradas: calculadas pelo SQLite a cada leitura
+    km_percorrido INTEGER GENERATED ALWAYS AS (
+        CASE WHEN km_final IS NULL THEN 0 ELSE km_final - km_inicial END
+    ) VIRTUAL,
+    duracao_min INTEGER GENERATED ALWAYS AS (
+        -- Chegada antes da saída conta como no dia seguinte
+        ((CAST(strftime('%s', '2000-01-01 ' || hora_chegada) AS INTEGER)
+          - CAST(strftime('%s', '2000-01-01 ' || hora_saida) AS INTEGER)) / 60 % 1440 + 1440) % 1440
+    ) VIRTUAL,
+    duracao TEXT GENERATED ALWAYS AS (
+        CASE WHEN duracao_min IS NULL THEN 'N/A'
+             ELSE printf('%02d:%02d', duracao_min / 60, duracao_min % 60) END
+    ) VIRTUAL
 );
 
--- Gatilho para atualizar o timestamp quando a viagem for modificada
-CREATE TRIGGER IF NOT EXISTS atualiza_timestamp
-AFTER UPDATE ON viagens
-FOR EACH ROW
-BEGIN
-    UPDATE viagens SET atualizado_em = CURRENT_TIMESTAMP WHERE id = OLD.id;
-END;
\ No newline at end of file
+-- Índice para ordenar o histórico da frota inteira sem varrer a tabela
+CREATE INDEX IF NOT EXISTS idx_viagens_data_iso ON viagens (data_iso, hora_saida);
+
+-- Histórico de um veículo: o custo não cresce com o tamanho da frota
+CREATE INDEX IF NOT EXISTS idx_viagens_veiculo_data ON viagens (veiculo_id, data_iso, hora_saida);
+
+-- Índices parciais com apenas as viagens em aberto: viagem ativa da frota
+-- inteira e de cada veículo
+CREATE INDEX IF NOT EXISTS idx_viagens_ativa
+ON viagens (data_iso, hora_saida) WHERE hora_chegada IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_viagens_veiculo_ativa
+ON viagens (veiculo_id, data_iso, hora_saida) WHERE hora_chegada IS NULL;
+
+-- Resumos por veículo, período e destino, mantidos pelas escritas do
+-- DatabaseManager (ver database/resumos.py)
+CREATE TABLE IF NOT EXISTS resumo_diario (
+    veiculo_id INTEGER NOT NULL,
+    periodo TEXT NOT NULL,             -- Formato YYYY-MM-DD
+    destino TEXT NOT NULL,
+    viagens INTEGER NOT NULL DEFAULT 0,
+    finalizadas INTEGER NOT NULL DEFAULT 0,
+    km INTEGER NOT NULL DEFAULT 0,
+    minutos INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (veiculo_id, periodo, destino)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS resumo_mensal (
+    veiculo_id INTEGER NOT NULL,
+    periodo TEXT NOT NULL,             -- Formato YYYY-MM
+    destino TEXT NOT NULL,
+    viagens INTEGER NOT NULL DEFAULT 0,
+    finalizadas INTEGER NOT NULL DEFAULT 0,
+    km INTEGER NOT NULL DEFAULT 0,
+    minutos INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (veiculo_id, periodo, destino)
+) WITHOUT ROWID;
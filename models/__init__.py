@@ -5,6 +5,7 @@ Exporta todas as classes de modelo para uso externo.
 """
 
 from .viagem import Viagem
+from .tabela_viagens import TabelaViagens
 from .veiculo import Veiculo
 
-__all__ = ['Viagem', 'Veiculo']
\ No newline at end of file
+__all__ = ['Viagem', 'TabelaViagens', 'Veiculo']
\ No newline at end of file
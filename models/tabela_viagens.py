@@ -0,0 +1,197 @@
+"""
+Módulo que define a TabelaViagens, armazenamento colunar de viagens.
+
+Cada campo fica em um ``array`` próprio (horários em minutos desde a época,
+quilometragens inteiras, destinos como códigos de uma tabela de strings
+internadas), sem um objeto Viagem e dois datetime por viagem. Os agregados
+usam NumPy sobre os buffers dos arrays, sem cópia.
+"""
+
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from models.viagem import Viagem
+from utils.colunas_derivadas import ColunasDerivadas
+
+EPOCA = datetime(1970, 1, 1)
+UM_MINUTO = timedelta(minutes=1)
+MINUTOS_DIA = 24 * 60
+
+# Marca valores ausentes (viagem ainda não finalizada)
+AUSENTE = -(2 ** 63)
+
+# Chaves de Viagem.to_dict, na mesma ordem
+_CHAVES = ('ID', 'data', 'hora_inicial', 'km_inicial', 'hora_final', 'km_final', 'destino',
+           'total_km', 'tempo_levado')
+
+
+class TabelaViagens:
+    """Coleção colunar de viagens com a interface de lista usada por Veiculo."""
+
+    def __init__(self, viagens: Optional[List[Viagem]] = None):
+        """Cria a tabela, opcionalmente a partir de uma lista de viagens."""
+        self._saida = array('q')
+        self._chegada = array('q')
+        self._km_inicial = array('q')
+        self._km_final = array('q')
+        self._destino = array('l')
+        self._destinos: List[str] = []
+        self._codigos: Dict[str, int] = {}
+        self._datas: Dict[int, str] = {}
+        for viagem in viagens or []:
+            self.append(viagem)
+
+    @staticmethod
+    def _para_minutos(instante: datetime) -> int:
+        """Converte um datetime em minutos desde a época."""
+        return (instante - EPOCA) // UM_MINUTO
+
+    @staticmethod
+    def _para_datetime(minutos: int) -> datetime:
+        """Converte minutos desde a época em datetime."""
+        return EPOCA + timedelta(minutes=minutos)
+
+    def _codigo_destino(self, destino: str) -> int:
+        """Retorna o código do destino, registrando-o na primeira ocorrência."""
+        codigo = self._codigos.get(destino)
+        if codigo is None:
+            codigo = self._codigos[destino] = len(self._destinos)
+            self._destinos.append(destino)
+        return codigo
+
+    def _data(self, minutos: int) -> str:
+        """Data DD/MM/YYYY do instante (cacheada por dia)."""
+        dia = minutos // MINUTOS_DIA
+        data = self._datas.get(dia)
+        if data is None:
+            data = self._datas[dia] = self._para_datetime(dia * MINUTOS_DIA).strftime('%d/%m/%Y')
+        return data
+
+    def _indice(self, indice: int) -> int:
+        """Normaliza índices negativos e valida o intervalo."""
+        total = len(self._saida)
+        if indice < 0:
+            indice += total
+        if not 0 <= indice < total:
+            raise IndexError('índice de viagem fora do intervalo')
+        return indice
+
+    # Interface de lista usada por Veiculo
+
+    def append(self, viagem: Viagem):
+        """Adiciona uma viagem ao final da tabela."""
+        self._saida.append(self._para_minutos(viagem.horario_saida))
+        self._km_inicial.append(viagem.km_inicial)
+        self._destino.append(self._codigo_destino(viagem.destino))
+        if viagem.horario_chegada is None:
+            self._chegada.append(AUSENTE)
+            self._km_final.append(AUSENTE)
+        else:
+            self._chegada.append(self._para_minutos(viagem.horario_chegada))
+            self._km_final.append(viagem.km_final)
+
+    def finalizar(self, indice: int, horario_chegada: datetime, km_final: int):
+        """Registra o término da viagem na posição informada."""
+        indice = self._indice(indice)
+        self._chegada[indice] = self._para_minutos(horario_chegada)
+        self._km_final[indice] = km_final
+
+    def clear(self):
+        """Remove todas as viagens."""
+        self.__init__()
+
+    def __len__(self) -> int:
+        return len(self._saida)
+
+    def __getitem__(self, indice: int) -> Viagem:
+        """Materializa a viagem da posição informada (uma cópia, não uma referência)."""
+        indice = self._indice(indice)
+        saida = self._saida[indice]
+        viagem = Viagem(self._data(saida), self._para_datetime(saida),
+                        self._km_inicial[indice], self._destinos[self._destino[indice]])
+        if self._chegada[indice] != AUSENTE:
+            viagem.finalizar_viagem(self._para_datetime(self._chegada[indice]), self._km_final[indice])
+        return viagem
+
+    def __iter__(self) -> Iterator[Viagem]:
+        for indice in range(len(self)):
+            yield self[indice]
+
+    # Consultas e agregados
+
+    def _colunas_numpy(self):
+        """Visões NumPy (sem cópia) de saída, chegada, km inicial e km final."""
+        return (np.frombuffer(self._saida, dtype=np.int64),
+                np.frombuffer(self._chegada, dtype=np.int64),
+                np.frombuffer(self._km_inicial, dtype=np.int64),
+                np.frombuffer(self._km_final, dtype=np.int64))
+
+    def _finalizadas(self):
+        """Máscara das viagens finalizadas, km percorrido e duração em minutos."""
+        saida, chegada, km_inicial, km_final = self._colunas_numpy()
+        finalizadas = chegada != AUSENTE
+        km = ColunasDerivadas.km_percorrido(km_inicial, km_final, finalizadas)
+        duracao = np.where(finalizadas, ColunasDerivadas.minutos_duracao(saida, chegada), 0)
+        return finalizadas, km, duracao
+
+    def total_km(self) -> int:
+        """Soma dos km percorridos nas viagens finalizadas."""
+        if not len(self):
+            return 0
+        return int(self._finalizadas()[1].sum())
+
+    def duracao_total_min(self) -> int:
+        """Soma das durações, em minutos, das viagens finalizadas."""
+        if not len(self):
+            return 0
+        return int(self._finalizadas()[2].sum())
+
+    def km_por_destino(self) -> Dict[str, int]:
+        """Km percorridos agrupados por destino."""
+        if not len(self):
+            return {}
+        _, km, _ = self._finalizadas()
+        codigos = np.frombuffer(self._destino, dtype=np.dtype(f'i{self._destino.itemsize}'))
+        somas = np.bincount(codigos, weights=km, minlength=len(self._destinos))
+        return {destino: int(soma) for destino, soma in zip(self._destinos, somas)}
+
+    def para_dicts(self) -> List[Dict]:
+        """
+        Histórico no formato de Viagem.to_dict, numerado a partir de 1.
+
+        As colunas são montadas com NumPy (textos de horário e duração vêm de
+        ColunasDerivadas) e só então combinadas em dicionários; nada
+        fica guardado entre chamadas além das próprias colunas.
+        """
+        total = len(self)
+        if not total:
+            return []
+        saida, chegada, km_inicial, km_final = self._colunas_numpy()
+        finalizadas, km, minutos = self._finalizadas()
+
+        dias, posicoes = np.unique(saida // MINUTOS_DIA, return_inverse=True)
+        # Cada dia distinto é formatado uma vez, sem passar pelo cache de _data
+        datas = np.array([(EPOCA + timedelta(days=int(dia))).strftime('%d/%m/%Y') for dia in dias],
+                         dtype=object)
+        km_final_texto = km_final.astype(object)
+        km_final_texto[~finalizadas] = "N/A"
+        codigos = np.frombuffer(self._destino, dtype=np.dtype(f'i{self._destino.itemsize}'))
+
+        colunas = (
+            range(1, total + 1),
+            datas[posicoes].tolist(),
+            ColunasDerivadas.formatar_horarios(saida).tolist(),
+            km_inicial.tolist(),
+            ColunasDerivadas.formatar_horarios(chegada, finalizadas).tolist(),
+            km_final_texto.tolist(),
+            np.array(self._destinos, dtype=object)[codigos].tolist(),
+            km.tolist(),
+            ColunasDerivadas.formatar_horarios(minutos, finalizadas).tolist(),
+        )
+        return [dict(zip(_CHAVES, linha)) for linha in zip(*colunas)]
+
+    def __repr__(self) -> str:
+        return f"TabelaViagens({len(self)} viagens, {len(self._destinos)} destinos)"
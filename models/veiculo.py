@@ -1,22 +1,45 @@
 """
 Módulo que define o modelo Veiculo para gerenciamento de viagens.
+
+No modo ``snapshot`` cada alteração regrava o arquivo JSON inteiro. No modo
+``journal`` as alterações são anexadas como eventos JSON Lines em um arquivo
+ao lado do snapshot (``historico_viagens.jsonl``) e o snapshot só é
+regravado na compactação.
 """
 
 import json
 import os
 from typing import List, Dict, Optional
-import pandas as pd
 from pathlib import Path
 from utils.data_utils import DataUtils, Validador, Sanitizador
+from utils.exportacao_excel import ExportadorExcel
 from models.viagem import Viagem
+from models.tabela_viagens import TabelaViagens
 
 class Veiculo:
     """Classe que representa um veículo e gerencia suas viagens."""
-    
-    def __init__(self, arquivo_dados: str = 'data/historico_viagens.json'):
-        """Inicializa o veículo e carrega os dados do arquivo."""
-        self.viagens: List[Viagem] = []
+
+    MODOS = ('snapshot', 'journal')
+
+    def __init__(self, arquivo_dados: str = 'data/historico_viagens.json',
+                 modo: str = 'snapshot', limite_compactacao: int = 1000):
+        """
+        Inicializa o veículo e carrega os dados do arquivo.
+
+        Args:
+            arquivo_dados: Caminho do snapshot JSON
+            modo: 'snapshot' (regrava o arquivo a cada alteração) ou 'journal'
+            limite_compactacao: Eventos no journal que disparam a compactação
+        """
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo desconhecido: {modo}")
+
+        self.viagens = TabelaViagens()
         self.arquivo_dados = arquivo_dados
+        self.arquivo_journal = str(Path(arquivo_dados).with_suffix('.jsonl'))
+        self.modo = modo
+        self.limite_compactacao = limite_compactacao
+        self._eventos_journal = 0
         self._inicializar_diretorio_dados()
         self.carregar_dados()
     
@@ -45,7 +68,14 @@ class Veiculo:
         # Cria e armazena a nova viagem
         nova_viagem = Viagem(data, horario_saida_dt, km, destino)
         self.viagens.append(nova_viagem)
-        self.salvar_dados()
+        self._registrar({
+            'op': 'iniciar',
+            'indice': len(self.viagens) - 1,
+            'data': data,
+            'hora_inicial': DataUtils.formatar_hora(horario_saida_dt),
+            'km_inicial': km,
+            'destino': destino,
+        })
         
         return {'success': True, 'message': 'Viagem iniciada com sucesso!'}
     
@@ -75,65 +105,177 @@ class Veiculo:
             return {'success': False, 'message': 'Data ou horário de chegada inválidos'}
         
         # Finaliza a viagem
-        self.viagens[-1].finalizar_viagem(horario_chegada_dt, km)
-        self.salvar_dados()
+        self.viagens.finalizar(-1, horario_chegada_dt, km)
+        self._registrar({
+            'op': 'finalizar',
+            'indice': len(self.viagens) - 1,
+            'hora_final': DataUtils.formatar_hora(horario_chegada_dt),
+            'km_final': km,
+        })
         
         return {'success': True, 'message': 'Viagem finalizada com sucesso!'}
     
     def obter_historico_viagens(self) -> List[Dict]:
         """Retorna o histórico de viagens como lista de dicionários."""
-        return [viagem.to_dict(idx + 1) for idx, viagem in enumerate(self.viagens)]
+        return self.viagens.para_dicts()
+
+    def resumo(self) -> Dict:
+        """Totais do histórico calculados sobre as colunas da tabela de viagens."""
+        return {
+            'viagens': len(self.viagens),
+            'total_km': self.viagens.total_km(),
+            'duracao_total_min': self.viagens.duracao_total_min(),
+            'km_por_destino': self.viagens.km_por_destino(),
+        }
     
-    def salvar_dados(self):
-        """Salva as viagens no arquivo JSON."""
+    def salvar_dados(self) -> bool:
+        """
+        Salva as viagens no arquivo JSON, substituindo-o de forma atômica.
+
+        Returns:
+            True se o snapshot foi gravado
+        """
+        temporario = f"{self.arquivo_dados}.tmp"
         try:
-            with open(self.arquivo_dados, 'w', encoding='utf-8') as f:
+            with open(temporario, 'w', encoding='utf-8') as f:
                 json.dump(self.obter_historico_viagens(), f, ensure_ascii=False, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, self.arquivo_dados)
         except IOError as e:
             print(f"Erro ao salvar dados: {e}")
-    
-    def carregar_dados(self):
-        """Carrega as viagens do arquivo JSON."""
-        if not os.path.exists(self.arquivo_dados):
+            return False
+        return True
+
+    def compactar(self):
+        """Grava o snapshot com o estado atual e esvazia o journal."""
+        if not self.salvar_dados():
+            # Sem snapshot novo o journal ainda é a única cópia dos eventos
+            return
+        # Se o processo cair antes do truncamento, a reaplicação dos eventos
+        # sobre o snapshot novo é idempotente (ver _aplicar_evento)
+        if os.path.exists(self.arquivo_journal):
+            with open(self.arquivo_journal, 'w', encoding='utf-8'):
+                pass
+        self._eventos_journal = 0
+
+    def _registrar(self, evento: Dict):
+        """Persiste uma alteração conforme o modo do veículo."""
+        if self.modo == 'snapshot':
+            self.salvar_dados()
             return
-            
+
+        linha = json.dumps(evento, ensure_ascii=False) + '\n'
         try:
-            with open(self.arquivo_dados, 'r', encoding='utf-8') as f:
-                dados = json.load(f)
-            
-            self.viagens.clear()
-            for viagem_data in dados:
+            # Uma única escrita em O_APPEND; uma linha truncada por queda é
+            # descartada na próxima carga
+            with open(self.arquivo_journal, 'a', encoding='utf-8') as f:
+                f.write(linha)
+                f.flush()
+                os.fsync(f.fileno())
+        except IOError as e:
+            print(f"Erro ao salvar dados: {e}")
+            return
+
+        self._eventos_journal += 1
+        if self._eventos_journal >= self.limite_compactacao:
+            self.compactar()
+
+    def _viagem_de_dict(self, viagem_data: Dict) -> Optional[Viagem]:
+        """Reconstrói uma viagem a partir do dicionário do snapshot."""
+        valido, horario_saida = DataUtils.validar_data_hora(
+            viagem_data['data'],
+            viagem_data['hora_inicial']
+        )
+        if not valido:
+            return None
+
+        nova_viagem = Viagem(
+            viagem_data['data'],
+            horario_saida,
+            viagem_data['km_inicial'],
+            viagem_data['destino']
+        )
+
+        if viagem_data.get('hora_final', "N/A") != "N/A":
+            valido, horario_chegada = DataUtils.validar_data_hora(
+                viagem_data['data'],
+                viagem_data['hora_final']
+            )
+            if valido:
+                nova_viagem.finalizar_viagem(
+                    horario_chegada,
+                    viagem_data['km_final']
+                )
+        return nova_viagem
+
+    def _aplicar_evento(self, evento: Dict):
+        """
+        Aplica um evento do journal às viagens carregadas.
+
+        Os eventos trazem a posição da viagem, então reaplicar um evento já
+        incluído no snapshot não tem efeito.
+        """
+        indice = evento['indice']
+        if evento['op'] == 'iniciar':
+            if indice < len(self.viagens):
+                return
+            viagem = self._viagem_de_dict(evento)
+            if viagem is not None:
+                self.viagens.append(viagem)
+        elif evento['op'] == 'finalizar':
+            if indice >= len(self.viagens):
+                return
+            valido, horario_chegada = DataUtils.validar_data_hora(self.viagens[indice].data,
+                                                                  evento['hora_final'])
+            if valido:
+                self.viagens.finalizar(indice, horario_chegada, evento['km_final'])
+
+    def _reaplicar_journal(self):
+        """Reaplica os eventos do journal e descarta uma última linha incompleta."""
+        if not os.path.exists(self.arquivo_journal):
+            return
+
+        validos = 0
+        self._eventos_journal = 0
+        with open(self.arquivo_journal, 'rb') as f:
+            for linha in f:
+                if not linha.endswith(b'\n'):
+                    break
                 try:
-                    valido, horario_saida = DataUtils.validar_data_hora(
-                        viagem_data['data'], 
-                        viagem_data['hora_inicial']
-                    )
-                    if not valido:
-                        continue
-                        
-                    nova_viagem = Viagem(
-                        viagem_data['data'],
-                        horario_saida,
-                        viagem_data['km_inicial'],
-                        viagem_data['destino']
-                    )
-                    
-                    if viagem_data['hora_final'] != "N/A":
-                        valido, horario_chegada = DataUtils.validar_data_hora(
-                            viagem_data['data'], 
-                            viagem_data['hora_final']
-                        )
-                        if valido:
-                            nova_viagem.finalizar_viagem(
-                                horario_chegada,
-                                viagem_data['km_final']
-                            )
-                    
-                    self.viagens.append(nova_viagem)
-                except (KeyError, ValueError) as e:
-                    print(f"Erro ao carregar viagem: {e}")
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"Erro ao carregar arquivo: {e}")
+                    self._aplicar_evento(json.loads(linha))
+                except (json.JSONDecodeError, KeyError, ValueError) as e:
+                    print(f"Erro ao carregar evento: {e}")
+                validos += len(linha)
+                self._eventos_journal += 1
+
+        if validos < os.path.getsize(self.arquivo_journal):
+            with open(self.arquivo_journal, 'r+b') as f:
+                f.truncate(validos)
+
+    def carregar_dados(self):
+        """Carrega as viagens do snapshot JSON e reaplica o journal, se houver."""
+        self.viagens.clear()
+        if os.path.exists(self.arquivo_dados) and os.path.getsize(self.arquivo_dados) > 0:
+            try:
+                with open(self.arquivo_dados, 'r', encoding='utf-8') as f:
+                    dados = json.load(f)
+
+                for viagem_data in dados:
+                    try:
+                        nova_viagem = self._viagem_de_dict(viagem_data)
+                        if nova_viagem is not None:
+                            self.viagens.append(nova_viagem)
+                    except (KeyError, ValueError) as e:
+                        print(f"Erro ao carregar viagem: {e}")
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Erro ao carregar arquivo: {e}")
+
+        # O journal também é lido no modo snapshot para não perder eventos
+        # gravados por uma instância em modo journal
+        self._reaplicar_journal()
+        if self.modo == 'snapshot' and self._eventos_journal:
+            self.compactar()
     
     def exportar_para_excel(self, caminho: str) -> Dict:
         """
@@ -143,8 +285,7 @@ class Veiculo:
             Dict: {'success': bool, 'message': str}
         """
         try:
-            df = pd.DataFrame(self.obter_historico_viagens())
-            df.to_excel(caminho, index=False, engine='openpyxl')
+            ExportadorExcel.exportar(self.obter_historico_viagens(), caminho)
             return {'success': True, 'message': f'Dados exportados para {caminho}'}
         except Exception as e:
             return {'success': False, 'message': f'Erro ao exportar: {str(e)}'}
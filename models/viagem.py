@@ -8,6 +8,9 @@ from utils.data_utils import DataUtils
 
 class Viagem:
     """Classe que representa uma viagem no diário de bordo."""
+
+    # Sem __dict__ por instância: históricos longos carregam milhares de viagens
+    __slots__ = ('data', 'horario_saida', 'km_inicial', 'destino', 'horario_chegada', 'km_final')
     
     def __init__(self, data: str, horario_saida: datetime, km_inicial: int, destino: str):
         """
@@ -0,0 +1,56 @@
+"""
+Módulo com o cálculo vetorizado das colunas derivadas do histórico
+(duração e km percorrido) sobre arrays NumPy.
+
+Segue as mesmas regras das colunas geradas de viagens: chegada antes da
+saída conta como dia seguinte e viagem sem km final percorreu 0 km. A view
+de histórico lê essas colunas direto do SQLite; este módulo atende quem
+ainda as calcula em Python (TabelaViagens e a exportação colunar).
+"""
+
+import numpy as np
+
+
+class ColunasDerivadas:
+    """Cálculo vetorizado de duração, km percorrido e textos HH:MM."""
+
+    MINUTOS_POR_DIA = 24 * 60
+
+    # Texto HH:MM para cada minuto do dia; a última posição representa "sem valor"
+    HORARIOS = np.array(
+        [f"{minuto // 60:02d}:{minuto % 60:02d}" for minuto in range(24 * 60)] + ['N/A'],
+        dtype=object
+    )
+
+    @classmethod
+    def minutos_duracao(cls, saida: np.ndarray, chegada: np.ndarray) -> np.ndarray:
+        """
+        Calcula a duração em minutos entre dois arrays de minutos.
+
+        Chegadas antes da saída são tratadas como no dia seguinte. Em arrays
+        de ponto flutuante, horários ausentes (NaN) resultam em NaN.
+        """
+        return np.mod(chegada - saida, cls.MINUTOS_POR_DIA)
+
+    @staticmethod
+    def km_percorrido(km_inicial: np.ndarray, km_final: np.ndarray,
+                      finalizadas: np.ndarray) -> np.ndarray:
+        """Calcula km_final - km_inicial, com 0 para viagens sem km final."""
+        return np.where(finalizadas, km_final - km_inicial, 0)
+
+    @classmethod
+    def formatar_horarios(cls, minutos: np.ndarray, validos=None) -> np.ndarray:
+        """
+        Formata minutos como HH:MM a partir de uma tabela com 1440 entradas.
+
+        Args:
+            minutos: Minutos do dia ou durações (reduzidos módulo um dia)
+            validos: Máscara opcional; fora dela o texto é "N/A"
+
+        Returns:
+            Array de objetos com os textos
+        """
+        indices = np.mod(minutos, cls.MINUTOS_POR_DIA)
+        if validos is not None:
+            indices = np.where(validos, indices, cls.MINUTOS_POR_DIA)
+        return cls.HORARIOS[indices]
@@ -2,44 +2,114 @@
 Módulo de utilitários para manipulação de dados, datas e validações.
 """
 
-from datetime import datetime
-from typing import Optional, Tuple, Union
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple, Union
 import re
 
+FORMATO_DATA = '%d/%m/%Y'
+FORMATO_HORA = '%H:%M'
+
+
+@lru_cache(maxsize=4096)
+def _ler_data(data: str) -> Optional[date]:
+    """Lê DD/MM/YYYY; formas não canônicas aceitas pelo strptime (ex.: 1/2/2024) caem nele."""
+    if len(data) == 10 and data[2] == '/' and data[5] == '/':
+        dia, mes, ano = data[:2], data[3:5], data[6:]
+        if (dia + mes + ano).isascii() and (dia + mes + ano).isdigit():
+            try:
+                return date(int(ano), int(mes), int(dia))
+            except ValueError:
+                return None
+    try:
+        return datetime.strptime(data, FORMATO_DATA).date()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=2048)
+def _ler_hora(hora: str) -> Optional[time]:
+    """Lê HH:MM; formas não canônicas aceitas pelo strptime (ex.: 8:05) caem nele."""
+    if len(hora) == 5 and hora[2] == ':':
+        horas, minutos = hora[:2], hora[3:]
+        if (horas + minutos).isascii() and (horas + minutos).isdigit():
+            try:
+                return time(int(horas), int(minutos))
+            except ValueError:
+                return None
+    try:
+        return datetime.strptime(hora, FORMATO_HORA).time()
+    except ValueError:
+        return None
+
+
 class DataUtils:
     """Classe com métodos utilitários para manipulação de datas e validações."""
     
     # Formatos constantes
-    FORMATO_DATA = '%d/%m/%Y'
-    FORMATO_HORA = '%H:%M'
+    FORMATO_DATA = FORMATO_DATA
+    FORMATO_HORA = FORMATO_HORA
     FORMATO_DATA_HORA = f'{FORMATO_DATA} {FORMATO_HORA}'
     
+    @classmethod
+    def converter_data(cls, data: str) -> Optional[date]:
+        """Converte DD/MM/YYYY em date (None se inválida). Resultados ficam em cache LRU."""
+        return _ler_data(data)
+
+    @classmethod
+    def converter_hora(cls, hora: str) -> Optional[time]:
+        """Converte HH:MM em time (None se inválida). Resultados ficam em cache LRU."""
+        return _ler_hora(hora)
+
     @classmethod
     def validar_data(cls, data: str) -> bool:
         """Valida se uma string está no formato DD/MM/YYYY."""
-        try:
-            datetime.strptime(data, cls.FORMATO_DATA)
-            return True
-        except ValueError:
-            return False
+        return _ler_data(data) is not None
     
     @classmethod
     def validar_hora(cls, hora: str) -> bool:
         """Valida se uma string está no formato HH:MM."""
-        try:
-            datetime.strptime(hora, cls.FORMATO_HORA)
-            return True
-        except ValueError:
-            return False
+        return _ler_hora(hora) is not None
     
     @classmethod
     def validar_data_hora(cls, data: str, hora: str) -> Tuple[bool, Optional[datetime]]:
         """Valida e combina data e hora em um objeto datetime."""
-        try:
-            data_hora = datetime.strptime(f"{data} {hora}", cls.FORMATO_DATA_HORA)
-            return True, data_hora
-        except ValueError:
+        dia, horario = _ler_data(data), _ler_hora(hora)
+        if dia is None or horario is None:
             return False, None
+        return True, datetime.combine(dia, horario)
+
+    @classmethod
+    def converter_datas(cls, datas: Iterable) -> List[Optional[date]]:
+        """Converte uma coluna de datas DD/MM/YYYY; valores inválidos viram None."""
+        return cls._converter_coluna(datas, _ler_data)
+
+    @classmethod
+    def converter_horas(cls, horas: Iterable) -> List[Optional[time]]:
+        """Converte uma coluna de horários HH:MM; valores inválidos viram None."""
+        return cls._converter_coluna(horas, _ler_hora)
+
+    @classmethod
+    def converter_datas_horas(cls, datas: Iterable, horas: Iterable) -> List[Optional[datetime]]:
+        """Combina colunas de datas e horários em datetimes; pares inválidos viram None."""
+        return [
+            datetime.combine(dia, horario) if dia is not None and horario is not None else None
+            for dia, horario in zip(cls.converter_datas(datas), cls.converter_horas(horas))
+        ]
+
+    @staticmethod
+    def _converter_coluna(valores: Iterable, ler) -> List:
+        """Aplica ``ler`` uma única vez a cada texto distinto da coluna."""
+        convertidos = {}
+        resultado = []
+        for valor in valores:
+            if not isinstance(valor, str):
+                resultado.append(None)
+                continue
+            if valor not in convertidos:
+                convertidos[valor] = ler(valor)
+            resultado.append(convertidos[valor])
+        return resultado
     
     @classmethod
     def formatar_data(cls, data: datetime) -> str:
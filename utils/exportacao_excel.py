@@ -0,0 +1,91 @@
+"""
+Módulo de exportação para Excel em modo ``write_only`` do openpyxl.
+
+As linhas são gravadas à medida que chegam, sem montar um DataFrame nem a
+planilha inteira em memória. Não é reexportado por ``utils`` para não
+carregar o openpyxl em toda importação.
+"""
+
+from datetime import date
+from typing import BinaryIO, Dict, Iterable, Union
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+
+class ExportadorExcel:
+    """Grava sequências de dicionários em uma planilha .xlsx linha a linha."""
+
+    COLUNAS_DATA = {'data'}
+    COLUNAS_KM = {'km_inicial', 'km_final', 'km_percorrido', 'total_km'}
+
+    FORMATO_DATA = 'DD/MM/YYYY'
+    FORMATO_KM = '#,##0'
+
+    @staticmethod
+    def _converter_data(valor):
+        """Converte DD/MM/YYYY em date; outros valores são mantidos."""
+        if isinstance(valor, str) and len(valor) == 10 and valor[2] == valor[5] == '/':
+            try:
+                return date(int(valor[6:]), int(valor[3:5]), int(valor[:2]))
+            except ValueError:
+                pass
+        return valor
+
+    @classmethod
+    def exportar(cls, linhas: Iterable[Dict], destino: Union[str, BinaryIO],
+                 titulo: str = 'Viagens') -> int:
+        """
+        Grava as linhas em um arquivo .xlsx.
+
+        Args:
+            linhas: Dicionários com as mesmas chaves (a primeira linha define as colunas)
+            destino: Caminho do arquivo ou objeto binário (ex.: BytesIO)
+            titulo: Nome da planilha
+
+        Returns:
+            Número de linhas de dados gravadas
+        """
+        workbook = Workbook(write_only=True)
+        planilha = workbook.create_sheet(titulo)
+
+        colunas = None
+        formatadores = []
+        total = 0
+        for linha in linhas:
+            if colunas is None:
+                colunas = list(linha.keys())
+                formatadores = [cls._formatador(planilha, coluna) for coluna in colunas]
+                planilha.append(colunas)
+            planilha.append([
+                formatar(linha[coluna]) if formatar else linha[coluna]
+                for coluna, formatar in zip(colunas, formatadores)
+            ])
+            total += 1
+
+        workbook.save(destino)
+        return total
+
+    @classmethod
+    def _formatador(cls, planilha, coluna: str):
+        """Retorna a função que transforma o valor da coluna em célula formatada."""
+        if coluna in cls.COLUNAS_DATA:
+            def formatar(valor):
+                valor = cls._converter_data(valor)
+                if not isinstance(valor, date):
+                    return valor
+                celula = WriteOnlyCell(planilha, valor)
+                celula.number_format = cls.FORMATO_DATA
+                return celula
+            return formatar
+
+        if coluna in cls.COLUNAS_KM:
+            def formatar(valor):
+                if not isinstance(valor, int):
+                    return valor
+                celula = WriteOnlyCell(planilha, valor)
+                celula.number_format = cls.FORMATO_KM
+                return celula
+            return formatar
+
+        return None
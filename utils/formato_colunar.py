@@ -0,0 +1,241 @@
+"""
+Módulo de conversão entre o histórico de viagens e formatos colunares
+(Parquet e Arrow IPC/Feather) usando o pyarrow.
+
+Datas, horários e quilometragens são gravados com tipos próprios (date32,
+time32, int64) em vez de texto, e a importação valida colunas inteiras de
+uma vez: valores inválidos viram nulos e só as linhas deles são rejeitadas.
+Não é reexportado por ``utils``: o pyarrow só é carregado quando o formato
+colunar é usado.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from .colunas_derivadas import ColunasDerivadas
+from .data_utils import Sanitizador
+
+
+class FormatoColunar:
+    """Exportação e importação do histórico em Parquet e Feather."""
+
+    FORMATOS = ('parquet', 'feather')
+
+    # Colunas lidas do banco; km_percorrido e duracao_min são recalculados em
+    # Arrow, o que evita avaliar as colunas geradas linha a linha no SQLite
+    COLUNAS = ['id', 'data_iso', 'hora_saida', 'km_inicial', 'destino', 'hora_chegada',
+               'km_final', 'criado_em', 'atualizado_em']
+
+    SCHEMA = pa.schema([
+        ('id', pa.int64()),
+        ('data', pa.date32()),
+        ('hora_saida', pa.time32('s')),
+        ('km_inicial', pa.int64()),
+        ('destino', pa.string()),
+        ('hora_chegada', pa.time32('s')),
+        ('km_final', pa.int64()),
+        ('km_percorrido', pa.int64()),
+        ('duracao_min', pa.int32()),
+        ('criado_em', pa.timestamp('s')),
+        ('atualizado_em', pa.timestamp('s')),
+    ])
+
+    # Texto HH:MM para cada minuto do dia, usado na importação
+    _HORARIOS = pa.array(ColunasDerivadas.HORARIOS[:-1].tolist())
+
+    @classmethod
+    def _hora(cls, valores: List) -> pa.Array:
+        """Converte textos HH:MM em time32 (inválidos viram nulos)."""
+        instantes = pc.strptime(pa.array(valores, pa.string()), format='%H:%M', unit='s',
+                                error_is_null=True)
+        return instantes.cast(pa.time32('s'))
+
+    @staticmethod
+    def _texto(coluna: pa.Array) -> Optional[pa.Array]:
+        """Retorna a coluna como texto sem espaços nas pontas, ou None se ela não for textual."""
+        if pa.types.is_dictionary(coluna.type):
+            coluna = coluna.dictionary_decode()
+        if pa.types.is_string(coluna.type) or pa.types.is_large_string(coluna.type):
+            return pc.utf8_trim_whitespace(coluna)
+        return None
+
+    @classmethod
+    def _coluna_data(cls, coluna: pa.Array) -> pa.Array:
+        """
+        Converte datas (date, timestamp ou texto YYYY-MM-DD / DD/MM/YYYY) em
+        date32. Textos inválidos viram nulos, e não erro do lote inteiro.
+        """
+        texto = cls._texto(coluna)
+        if texto is None:
+            if not (pa.types.is_null(coluna.type) or pa.types.is_date(coluna.type)
+                    or pa.types.is_timestamp(coluna.type)):
+                raise ValueError(f"Tipo não suportado na coluna data: {coluna.type}")
+            return coluna.cast(pa.date32(), safe=False)
+
+        iso = pc.replace_substring_regex(texto, r'^(\d{1,2})/(\d{1,2})/(\d{4})$', r'\3-\2-\1')
+        instantes = pc.strptime(iso, format='%Y-%m-%d', unit='s', error_is_null=True)
+        # O strptime do Arrow aceita 30/02 (vira 01/03): o dia lido tem de ser o informado
+        dia = pc.struct_field(pc.extract_regex(iso, r'^\d{4}-\d{1,2}-(?P<dia>\d{1,2})$'), [0])
+        dia_confere = pc.equal(pc.day(instantes), pc.cast(dia, pa.int64()))
+        return pc.if_else(dia_confere, instantes, None).cast(pa.date32())
+
+    @classmethod
+    def _coluna_hora(cls, coluna: pa.Array) -> pa.Array:
+        """Converte horários (time ou texto HH:MM) em time32; textos inválidos viram nulos."""
+        texto = cls._texto(coluna)
+        if texto is None:
+            if not (pa.types.is_null(coluna.type) or pa.types.is_time(coluna.type)):
+                raise ValueError(f"Tipo não suportado na coluna de horário: {coluna.type}")
+            return coluna.cast(pa.time32('s'), safe=False)
+        return pc.strptime(texto, format='%H:%M', unit='s', error_is_null=True).cast(pa.time32('s'))
+
+    @classmethod
+    def _coluna_inteira(cls, coluna: pa.Array) -> pa.Array:
+        """Converte quilometragens em int64; textos não numéricos e frações viram nulos."""
+        texto = cls._texto(coluna)
+        if texto is not None:
+            numerico = pc.match_substring_regex(texto, r'^-?\d{1,18}$')
+            return pc.if_else(numerico, texto, None).cast(pa.int64())
+        if pa.types.is_floating(coluna.type):
+            inteiro = pc.equal(pc.trunc(coluna), coluna)
+            return pc.if_else(inteiro, coluna, None).cast(pa.int64(), safe=False)
+        return coluna.cast(pa.int64())
+
+    @classmethod
+    def lote_para_arrow(cls, linhas: List[Tuple]) -> pa.RecordBatch:
+        """Converte um lote de tuplas (na ordem de COLUNAS) em RecordBatch tipado."""
+        colunas = dict(zip(cls.COLUNAS, zip(*linhas)))
+        saida = cls._hora(colunas['hora_saida'])
+        chegada = cls._hora(colunas['hora_chegada'])
+        km_inicial = pa.array(colunas['km_inicial'], pa.int64())
+        km_final = pa.array(colunas['km_final'], pa.int64())
+
+        # Mesmas regras das colunas geradas de viagens (chegada antes da saída = dia seguinte)
+        km_percorrido = pc.fill_null(pc.subtract(km_final, km_inicial), 0)
+        segundos = [coluna.cast(pa.int32()).to_numpy(zero_copy_only=False) for coluna in (saida, chegada)]
+        minutos = ColunasDerivadas.minutos_duracao(segundos[0] // 60, segundos[1] // 60)
+        duracao_min = pa.array(minutos, from_pandas=True).cast(pa.int32())
+
+        return pa.RecordBatch.from_arrays([
+            pa.array(colunas['id'], pa.int64()),
+            pa.array(colunas['data_iso'], pa.string()).cast(pa.date32()),
+            saida,
+            km_inicial,
+            pa.array(colunas['destino'], pa.string()),
+            chegada,
+            km_final,
+            km_percorrido,
+            duracao_min,
+            pa.array(colunas['criado_em'], pa.string()).cast(pa.timestamp('s')),
+            pa.array(colunas['atualizado_em'], pa.string()).cast(pa.timestamp('s')),
+        ], schema=cls.SCHEMA)
+
+    @classmethod
+    def exportar(cls, lotes: Iterable[List[Tuple]], destino, formato: str) -> int:
+        """
+        Grava lotes de tuplas em Parquet ou Feather sem montar a tabela inteira.
+
+        Args:
+            lotes: Lotes de tuplas na ordem de COLUNAS (ex.: DatabaseManager.iter_lotes)
+            destino: Caminho do arquivo ou objeto binário (ex.: BytesIO)
+            formato: 'parquet' ou 'feather'
+
+        Returns:
+            Número de linhas gravadas
+        """
+        if formato == 'parquet':
+            escritor = pq.ParquetWriter(destino, cls.SCHEMA, compression='zstd')
+        elif formato == 'feather':
+            escritor = ipc.new_file(destino, cls.SCHEMA,
+                                    options=ipc.IpcWriteOptions(compression='zstd'))
+        else:
+            raise ValueError(f"Formato colunar desconhecido: {formato}")
+
+        total = 0
+        with escritor:
+            for linhas in lotes:
+                lote = cls.lote_para_arrow(linhas)
+                escritor.write_batch(lote)
+                total += lote.num_rows
+        return total
+
+    @classmethod
+    def ler_lotes(cls, origem, formato: str, tamanho_lote: int = 100000) -> Iterator[pa.RecordBatch]:
+        """Lê um arquivo Parquet ou Feather em lotes."""
+        if formato == 'parquet':
+            yield from pq.ParquetFile(origem).iter_batches(batch_size=tamanho_lote)
+        elif formato == 'feather':
+            yield from feather.read_table(origem).to_batches(max_chunksize=tamanho_lote)
+        else:
+            raise ValueError(f"Formato colunar desconhecido: {formato}")
+
+    @classmethod
+    def validar_lote(cls, lote: pa.RecordBatch, deslocamento: int = 0) -> Tuple[List[Tuple], List[Dict]]:
+        """
+        Valida um lote inteiro de uma vez e o converte em linhas para o INSERT.
+
+        Args:
+            lote: RecordBatch com ao menos data, hora_saida, km_inicial e destino
+            deslocamento: Índice da primeira linha do lote na entrada completa
+
+        Returns:
+            Tupla (linhas válidas no formato de DatabaseManager.inserir_linhas_validadas,
+            rejeições no formato {'linha': índice, 'erro': motivo})
+        """
+        faltantes = {'data', 'hora_saida', 'km_inicial', 'destino'} - set(lote.schema.names)
+        if faltantes:
+            raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(sorted(faltantes))}")
+
+        total = lote.num_rows
+        nulos = pa.nulls(total)
+        data = cls._coluna_data(lote.column('data'))
+        saida = cls._coluna_hora(lote.column('hora_saida'))
+        km_inicial = cls._coluna_inteira(lote.column('km_inicial'))
+        destino = pc.utf8_trim_whitespace(lote.column('destino').cast(pa.string()))
+        chegada_original = lote.column('hora_chegada') if 'hora_chegada' in lote.schema.names else nulos
+        km_final_original = lote.column('km_final') if 'km_final' in lote.schema.names else nulos
+        chegada = cls._coluna_hora(chegada_original)
+        km_final = cls._coluna_inteira(km_final_original)
+
+        # Regras na ordem em que aparecem na mensagem de rejeição
+        regras = [
+            (pc.is_null(data), 'Data inválida'),
+            (pc.is_null(saida), 'Horário de saída inválido'),
+            (pc.or_kleene(pc.is_null(km_inicial), pc.less(km_inicial, 0)), 'Quilometragem inicial inválida'),
+            (pc.or_kleene(pc.is_null(destino), pc.equal(pc.utf8_length(destino), 0)), 'Destino não informado'),
+            (pc.not_equal(pc.is_null(chegada_original), pc.is_null(km_final_original)),
+             'Hora de chegada e KM final devem ser informados juntos'),
+            (pc.and_(pc.is_valid(chegada_original), pc.is_null(chegada)), 'Horário de chegada inválido'),
+            (pc.and_(pc.is_valid(km_final_original), pc.is_null(km_final)), 'Quilometragem final inválida'),
+            (pc.fill_null(pc.less(km_final, km_inicial), False), 'KM final menor que KM inicial'),
+        ]
+
+        invalidas = np.zeros(total, dtype=bool)
+        rejeitadas = []
+        for mascara, erro in regras:
+            novas = np.asarray(pc.fill_null(mascara, True)) & ~invalidas
+            rejeitadas.extend({'linha': deslocamento + int(i), 'erro': erro} for i in np.flatnonzero(novas))
+            invalidas |= novas
+        rejeitadas.sort(key=lambda r: r['linha'])
+
+        validas = pa.array(~invalidas)
+        data = pc.filter(data, validas).cast(pa.timestamp('s'))
+        minutos_saida = pc.divide(pc.filter(saida, validas).cast(pa.int32()), 60)
+        minutos_chegada = pc.divide(pc.filter(chegada, validas).cast(pa.int32()), 60)
+
+        linhas = list(zip(
+            pc.strftime(data, format='%d/%m/%Y').to_pylist(),
+            pc.strftime(data, format='%Y-%m-%d').to_pylist(),
+            pc.take(cls._HORARIOS, minutos_saida).to_pylist(),
+            pc.filter(km_inicial, validas).to_pylist(),
+            [Sanitizador.sanitizar_destino(texto) for texto in pc.filter(destino, validas).to_pylist()],
+            pc.take(cls._HORARIOS, minutos_chegada).to_pylist(),
+            pc.filter(km_final, validas).to_pylist(),
+        ))
+        return linhas, rejeitadas
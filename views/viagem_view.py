@@ -3,13 +3,39 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from controllers.viagem_controller import ViagemController
+from database import VEICULO_PADRAO
+
+
+@st.cache_resource
+def obter_controller(veiculo_id: int = VEICULO_PADRAO) -> ViagemController:
+    """Controller único por veículo e processo, reaproveitado entre reruns (o DatabaseManager é compartilhado)."""
+    return ViagemController(veiculo_id=veiculo_id)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _dataframe_historico(_historico: list, versao_dados: tuple, chave_pagina: tuple) -> pd.DataFrame:
+    """
+    Monta o DataFrame exibido no histórico.
+
+    O conteúdo de ``_historico`` não é hasheado: a chave do cache é a versão
+    dos dados (id do controller, versao_dados) mais a página exibida.
+    """
+    # duracao e km_percorrido já vêm calculados pelo SQLite (colunas geradas)
+    return pd.DataFrame(_historico)
 
 
 class ViagemView:
     """Classe responsável pela interface do usuário do Diário de Bordo."""
 
+    TAMANHO_PAGINA = 50
+
+    # Índice 0 = domingo, como o %w do SQLite
+    DIAS_SEMANA = ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado']
+
     def __init__(self):
-        self.controller = ViagemController()
+        # Controller do veículo padrão, usado também para listar e cadastrar a frota
+        self.frota = obter_controller()
+        self.controller = self.frota
         self._configurar_pagina()
 
     def _configurar_pagina(self):
@@ -25,11 +51,39 @@ class ViagemView:
         """Método principal para execução da aplicação."""
         self.mostrar_menu_principal()
 
+    def _selecionar_veiculo(self):
+        """Seleção do veículo na barra lateral; as telas passam a usar o controller dele."""
+        veiculos = {v['id']: v for v in self.frota.obter_veiculos()}
+        if veiculos:
+            veiculo_id = st.sidebar.selectbox(
+                "Veículo",
+                list(veiculos),
+                format_func=lambda i: " - ".join(filter(None, [veiculos[i]['placa'], veiculos[i]['descricao']])),
+                key="veiculo_id",
+                # A paginação do histórico pertence ao veículo anterior
+                on_change=lambda: st.session_state.pop('historico_cursor', None)
+            )
+            self.controller = obter_controller(veiculo_id)
+
+        with st.sidebar.expander("Cadastrar veículo"):
+            with st.form("form_cadastro_veiculo", clear_on_submit=True):
+                placa = st.text_input("Placa", max_chars=10)
+                descricao = st.text_input("Descrição", max_chars=100)
+                if st.form_submit_button("Cadastrar"):
+                    resultado = self.frota.cadastrar_veiculo(placa, descricao)
+                    if resultado['success']:
+                        st.success(resultado['message'])
+                        st.rerun()
+                    else:
+                        st.error(resultado['message'])
+
     def mostrar_menu_principal(self):
         """Exibe o menu principal e gerencia a navegação."""
+        self._selecionar_veiculo()
+
         opcao = st.sidebar.selectbox(
             "Menu",
-            ["Iniciar Viagem", "Finalizar Viagem", "Histórico", "Editar Viagem", "Exportar Dados"]
+            ["Iniciar Viagem", "Finalizar Viagem", "Histórico", "Painel", "Editar Viagem", "Exportar Dados"]
         )
 
         if opcao == "Iniciar Viagem":
@@ -38,6 +92,8 @@ class ViagemView:
             self._mostrar_formulario_fim()
         elif opcao == "Histórico":
             self._mostrar_historico()
+        elif opcao == "Painel":
+            self._mostrar_painel()
         elif opcao == "Editar Viagem":
             self._mostrar_edicao()
         else:
@@ -137,17 +193,21 @@ class ViagemView:
         """Exibe o histórico de viagens."""
         st.header("Histórico de Viagens")
 
-        historico = self.controller.obter_historico()
+        cursor_pagina = st.session_state.get('historico_cursor', {})
+        pagina = self.controller.obter_historico_pagina(limite=self.TAMANHO_PAGINA, **cursor_pagina)
+        historico = pagina['viagens']
 
         if not historico:
+            if cursor_pagina:
+                # A página deixou de existir (ex.: viagens editadas); volta ao início
+                st.session_state.pop('historico_cursor')
+                st.rerun()
             st.info("Nenhuma viagem registrada ainda.")
             return
 
-        df = pd.DataFrame(historico)
-
-        # Calcula duração e km percorrido para exibição
-        df['duracao'] = df.apply(lambda x: self._calcular_duracao(x['hora_saida'], x['hora_chegada']), axis=1)
-        df['km_percorrido'] = df.apply(lambda x: x['km_final'] - x['km_inicial'] if x['km_final'] else 0, axis=1)
+        chave_pagina = tuple(sorted(cursor_pagina.items()))
+        versao_dados = (id(self.controller), self.controller.versao_dados)
+        df = _dataframe_historico(historico, versao_dados, chave_pagina)
 
         st.dataframe(
             df[['id', 'data', 'hora_saida', 'hora_chegada', 'destino', 'km_inicial', 'km_final', 'km_percorrido',
@@ -156,6 +216,71 @@ class ViagemView:
             hide_index=True
         )
 
+        col_anterior, col_proxima = st.columns(2)
+        with col_anterior:
+            if st.button("◀ Anterior", disabled=pagina['anterior'] is None):
+                st.session_state['historico_cursor'] = {'before_key': pagina['anterior']}
+                st.rerun()
+        with col_proxima:
+            if st.button("Próxima ▶", disabled=pagina['proxima'] is None):
+                st.session_state['historico_cursor'] = {'after_key': pagina['proxima']}
+                st.rerun()
+
+    @staticmethod
+    def _formatar_minutos(minutos: float) -> str:
+        """Formata uma quantidade de minutos como HH:MM."""
+        minutos = int(round(minutos))
+        return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+    def _mostrar_painel(self):
+        """Painel com indicadores agregados pelo SQLite a partir das tabelas de resumo."""
+        st.header("Painel")
+
+        painel = self.controller.obter_painel()
+        total = painel['total']
+        if not total['viagens']:
+            st.info("Nenhuma viagem registrada ainda.")
+            return
+
+        duracao_media = painel['duracao_media_min']
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("KM rodados", f"{total['km']:,}".replace(',', '.'))
+        col2.metric("Viagens", total['viagens'])
+        col3.metric("Duração média", self._formatar_minutos(duracao_media) if duracao_media is not None else "N/A")
+        col4.metric("Tempo ao volante", self._formatar_minutos(total['minutos']))
+
+        st.subheader("KM por mês")
+        st.bar_chart(pd.DataFrame(painel['km_por_mes']).set_index('periodo')['km'])
+
+        col_destinos, col_dias = st.columns(2)
+        with col_destinos:
+            st.subheader("Principais destinos")
+            destinos = pd.DataFrame(painel['destinos'])
+            destinos['tempo'] = destinos['minutos'].map(self._formatar_minutos)
+            st.dataframe(
+                destinos[['destino', 'viagens', 'km', 'tempo']],
+                use_container_width=True,
+                hide_index=True
+            )
+
+        with col_dias:
+            st.subheader("Uso por dia da semana")
+            dias = pd.DataFrame(painel['dias_semana'])
+            dias['dia'] = [self.DIAS_SEMANA[dia] for dia in dias['dia_semana']]
+            dias['horas'] = dias['minutos'] / 60
+            # Tabela em vez de gráfico: o gráfico ordenaria os dias alfabeticamente
+            st.dataframe(
+                dias[['dia', 'viagens', 'km', 'horas']],
+                column_config={
+                    'horas': st.column_config.ProgressColumn(
+                        "Horas ao volante", format="%.1f", min_value=0,
+                        max_value=max(float(dias['horas'].max()), 1.0)
+                    )
+                },
+                use_container_width=True,
+                hide_index=True
+            )
+
     def _mostrar_edicao(self):
         """Interface para edição de viagens."""
         st.header("Editar Viagem")
@@ -219,16 +344,15 @@ class ViagemView:
         """Interface para exportação do histórico."""
         st.header("Exportar Histórico")
 
-        historico = self.controller.obter_historico()
-
-        if not historico:
+        # Basta uma viagem para saber se há o que exportar
+        if not self.controller.obter_historico_pagina(limite=1)['viagens']:
             st.warning("Nenhum dado disponível para exportação")
             return
 
         # Seleção do formato
         formato = st.radio(
             "Selecione o formato de exportação",
-            ["Excel", "JSON", "CSV"],
+            ["Excel", "JSON", "CSV", "Parquet", "Feather"],
             horizontal=True
         )
 
@@ -239,6 +363,8 @@ class ViagemView:
                 decimal = st.selectbox("Separador decimal", [",", "."], index=0)
             elif formato == "Excel":
                 st.info("Excel: Formato otimizado para Português-Brasil")
+            elif formato in ("Parquet", "Feather"):
+                st.info(f"{formato}: formato colunar com tipos de data, hora e inteiros para análise")
 
         # Nome do arquivo personalizado
         nome_arquivo = st.text_input(
@@ -248,48 +374,22 @@ class ViagemView:
 
         # Botão de exportação
         if st.button(f"Exportar para {formato}"):
-            extensao = formato.lower()
-            caminho = f"{nome_arquivo}.{extensao}"
-
-            resultado = self.controller.exportar_historico(formato=extensao, caminho=caminho)
+            # Gerado em memória: nenhum arquivo temporário fica no disco
+            resultado = self.controller.exportar_historico(formato=formato.lower())
 
             if resultado['success']:
                 st.success(resultado['message'])
 
-                # Oferecer download do arquivo
-                with open(resultado['path'], "rb") as file:
-                    btn = st.download_button(
-                        label="Baixar arquivo",
-                        data=file,
-                        file_name=os.path.basename(resultado['path']),
-                        mime=(
-                            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" if formato == "Excel" else
-                            "application/json" if formato == "JSON" else
-                            "text/csv"
-                        )
-                    )
-
-                # Remover o arquivo temporário após download
-                if btn:
-                    os.remove(resultado['path'])
+                extensao = os.path.splitext(resultado['file_name'])[1]
+                st.download_button(
+                    label="Baixar arquivo",
+                    data=resultado['data'],
+                    file_name=f"{nome_arquivo}{extensao}",
+                    mime=resultado['mime']
+                )
             else:
                 st.error(resultado['message'])
 
-    def _calcular_duracao(self, hora_inicio: str, hora_fim: str) -> str:
-        """Calcula a duração entre duas horas."""
-        if not hora_inicio or not hora_fim:
-            return "N/A"
-
-        try:
-            inicio = datetime.strptime(hora_inicio, "%H:%M")
-            fim = datetime.strptime(hora_fim, "%H:%M")
-            diferenca = fim - inicio
-            horas = diferenca.seconds // 3600
-            minutos = (diferenca.seconds % 3600) // 60
-            return f"{horas:02d}:{minutos:02d}"
-        except:
-            return "N/A"
-
 # """
 # Módulo de view para a interface do diário de bordo.
 # """